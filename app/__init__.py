@@ -2,20 +2,28 @@ import os
 from flask import Flask, render_template, request, session, redirect
 from flask_cors import CORS
 from flask_migrate import Migrate
-from flask_wtf.csrf import CSRFProtect, generate_csrf
+from flask_wtf.csrf import CSRFProtect, ValidationError, generate_csrf, validate_csrf
 from flask_login import LoginManager
 
-from .models import db, User
+from .models import db
 from .api.user_routes import user_routes
 from .api.auth_routes import auth_routes
 from .api.portfolio_stocks_routes import portfolio_stocks_routes
 from .api.watchlist_stocks_routes import watchlist_stocks_routes
 from .api.external_stocks import external_stocks
 from .api.stocks import stocks
+from .api.trade_routes import trade_routes
 
 from .seeds import seed_commands
+from .market_data.commands import market_data_commands
 
 from .config import Config
+from .logging_config import configure_logging
+from .http_cache import conditional_response
+from .user_cache import get_user
+from .static_files import serve_static
+
+configure_logging()
 
 app = Flask(__name__)
 
@@ -26,11 +34,13 @@ login.login_view = 'auth.unauthorized'
 
 @login.user_loader
 def load_user(id):
-    return User.query.get(int(id))
+    # Cached per request and per worker; see app/user_cache.py
+    return get_user(id)
 
 
 # Tell flask about our seed commands
 app.cli.add_command(seed_commands)
+app.cli.add_command(market_data_commands)
 
 app.config.from_object(Config)
 app.register_blueprint(user_routes, url_prefix='/api/users')
@@ -39,12 +49,19 @@ app.register_blueprint(portfolio_stocks_routes, url_prefix='/api/portfolio-stock
 app.register_blueprint(watchlist_stocks_routes, url_prefix='/api/watchlist-stocks')
 app.register_blueprint(external_stocks, url_prefix='/api/external-stocks')
 app.register_blueprint(stocks, url_prefix='/api/stocks')
+app.register_blueprint(trade_routes, url_prefix='/api/trades')
 db.init_app(app)
 Migrate(app, db)
 
 # Application Security
 CORS(app)
 
+# ETags, 304s and gzip/brotli for everything the API sends
+app.after_request(conditional_response)
+
+# The React build is served by WhiteNoise before Flask ever sees the request
+serve_static(app)
+
 
 # Since we are deploying with Docker and Flask,
 # we won't be using a buildpack when we deploy to Heroku.
@@ -60,8 +77,33 @@ def https_redirect():
             return redirect(url, code=code)
 
 
+def csrf_cookie_is_current():
+    """
+    True while the request's csrf_token cookie still matches the session and
+    has more than CSRF_REFRESH_MARGIN seconds left, so there's no need to
+    sign a new one.
+    """
+    token = request.cookies.get('csrf_token')
+    if not token:
+        return False
+    time_limit = app.config['WTF_CSRF_TIME_LIMIT']
+    if time_limit:
+        time_limit = max(time_limit - app.config['CSRF_REFRESH_MARGIN'], 1)
+    try:
+        validate_csrf(token, time_limit=time_limit)
+    except ValidationError:
+        return False
+    return True
+
+
 @app.after_request
 def inject_csrf_token(response):
+    # Static files and publicly cacheable responses must not carry a
+    # Set-Cookie, or no CDN or proxy will cache them
+    if request.endpoint == 'static' or response.cache_control.public:
+        return response
+    if csrf_cookie_is_current():
+        return response
     response.set_cookie(
         'csrf_token',
         generate_csrf(),
@@ -77,4 +119,6 @@ def inject_csrf_token(response):
 def react_root(path):
     if path == 'favicon.ico':
         return app.send_static_file('favicon.ico')
-    return app.send_static_file('index.html')
+    response = app.send_static_file('index.html')
+    response.cache_control.no_cache = True
+    return response
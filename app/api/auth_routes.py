@@ -2,6 +2,7 @@ from flask import Blueprint, jsonify, session, request
 from app.models import User, db
 from app.forms import LoginForm
 from app.forms import SignUpForm
+from app.user_cache import forget_user
 from flask_login import current_user, login_user, logout_user, login_required
 
 auth_routes = Blueprint('auth', __name__)
@@ -69,6 +70,9 @@ def sign_up():
         )
         db.session.add(user)
         db.session.commit()
+        # Ids restart after `flask seed undo`, so a worker may still cache
+        # an old user under this one
+        forget_user(user.id)
         login_user(user)
         return user.to_dict()
     return {'errors': validation_errors_to_error_messages(form.errors)}, 401
@@ -1,22 +1,24 @@
 from flask import Blueprint, jsonify, request
 import requests
-import os
-from datetime import datetime, timedelta
+from app.market_data import get_bars, get_cached_or_fetch
+from app.market_data.downsample import lttb_indices, minmax_buckets, requested_points
+from app.market_data.fetch import CACHE_TTLS
+from app.http_cache import cache_control
+from .wire import negotiated
 
 external_stocks = Blueprint('external_stocks', __name__)
 
 # --- Single stock info route ---
 @external_stocks.route('/<ticker>', methods=['GET'])
+@cache_control(max_age=CACHE_TTLS['overview'], public=True)
 def get_single_stock(ticker):
-    api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
-    
-    # Get company overview
-    url = f"https://www.alphavantage.co/query?function=OVERVIEW&symbol={ticker}&apikey={api_key}"
+    ticker = ticker.upper()
 
+    # Get company overview
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = get_cached_or_fetch(f"overview_{ticker}", 'OVERVIEW', symbol=ticker)
+        if data is None:
+            return jsonify({"error": f"Market data for {ticker} is unavailable right now"}), 503
         
         # Alpha Vantage returns different structure
         if 'Symbol' in data:
@@ -41,49 +43,45 @@ def get_single_stock(ticker):
 
 # --- Chart / historical data route ---
 @external_stocks.route('/<ticker>/chart', methods=['GET'])
+@cache_control(max_age=CACHE_TTLS['intraday'], public=True)
 def get_chart_data(ticker):
-    api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
-
+    ticker = ticker.upper()
     timespan = request.args.get('timespan', 'day')
+    # Line charts keep the real bars LTTB picks; candlesticks get merged buckets
+    style = request.args.get('style', 'ohlc')
+    try:
+        points = requested_points(request.args)
+    except ValueError as e:
+        return {'error': f"Invalid points: {e}"}, 400
     
-    # Map timespan to Alpha Vantage function
-    if timespan == 'day' or timespan == 'minute':
-        function = 'TIME_SERIES_INTRADAY'
-        interval = '5min'
-        url = f"https://www.alphavantage.co/query?function={function}&symbol={ticker}&interval={interval}&apikey={api_key}"
-    else:
-        function = 'TIME_SERIES_DAILY'
-        url = f"https://www.alphavantage.co/query?function={function}&symbol={ticker}&apikey={api_key}"
+    # Intraday (5min) bars for the day view, daily bars otherwise
+    interval = '5min' if timespan in ('day', 'minute') else 'daily'
 
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Transform Alpha Vantage format to match expected format
-        if 'Time Series (5min)' in data:
-            time_series = data['Time Series (5min)']
-        elif 'Time Series (Daily)' in data:
-            time_series = data['Time Series (Daily)']
-        else:
+        # Served from the local bar store, which only downloads the missing tail
+        bars = get_bars(ticker, interval)
+        if not bars:
             return jsonify({"error": "No time series data found"}), 404
+
+        # Scale the payload to the chart's width rather than the history length
+        if points and len(bars) > points:
+            if style == 'line':
+                bars = bars[lttb_indices(bars.ts, bars.close, points)]
+            else:
+                bars = minmax_buckets(bars, points)
         
-        # Convert to expected format
-        results = []
-        for timestamp, values in sorted(time_series.items()):
-            results.append({
-                't': int(datetime.strptime(timestamp.split()[0], '%Y-%m-%d').timestamp() * 1000),
-                'o': float(values['1. open']),
-                'h': float(values['2. high']),
-                'l': float(values['3. low']),
-                'c': float(values['4. close']),
-                'v': int(values['5. volume'])
-            })
-        
-        return jsonify({
+        # Struct-of-arrays: one column per field instead of an object per bar
+        return negotiated({
             'status': 'OK',
-            'results': results,
+            'results': {
+                't': bars.ts * 1000,
+                'o': bars.open,
+                'h': bars.high,
+                'l': bars.low,
+                'c': bars.close,
+                'v': bars.volume,
+            },
             'ticker': ticker
-        }), 200
+        })
     except requests.exceptions.RequestException as e:
         return jsonify({"error": f"Error fetching chart data for {ticker}: {str(e)}"}), 500
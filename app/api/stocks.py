@@ -1,21 +1,72 @@
+import logging
 import os
 from flask import Blueprint, jsonify, request
-import requests
 from flask_login import login_required, current_user
 from app.models import db, PortfolioStocks
-import traceback
-from datetime import datetime, timedelta
-import time
+from app.market_data import (
+    api_cache, shared_cache, ensure_bars, get_cached, get_cached_or_fetch)
+from app.market_data.ranges import CHART_RANGES, chart_ranges
+from app.market_data.downsample import lttb, requested_points
+from app.http_cache import cache_control
+from .wire import negotiated
+from concurrent.futures import ThreadPoolExecutor, wait
 
 stocks = Blueprint('stocks', __name__)
+logger = logging.getLogger(__name__)
 
-# Simple in-memory cache with timestamps
-api_cache = {}
-CACHE_DURATION = 300  # 5 minutes cache
+# Upstream calls for one request (a stock page or a batch of quotes) run
+# side by side on this pool instead of one after another
+MAX_BATCH_TICKERS = 50
+STOCK_FETCH_DEADLINE = float(os.getenv('STOCK_FETCH_DEADLINE', 8.0))
 
-# Clear cache on startup to avoid stale rate-limit messages
-print("🧹 Clearing API cache on startup...")
-api_cache.clear()
+
+def default_upstream_workers():
+    """
+    OS threads are costly, so a threaded worker keeps a small pool. Under
+    gevent they are greenlets, so every connection gets a full stock page
+    (4 jobs) and requests never queue behind each other.
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return 8
+    if monkey.is_module_patched('threading'):
+        return 4 * int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 200))
+    return 8
+
+
+upstream_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('UPSTREAM_WORKERS', 0)) or default_upstream_workers())
+
+
+# Placeholder chart data for ranges the bar store can't fill yet. Built once;
+# get_stock only ever replaces these lists, never mutates them.
+MOCK_CHART_DATA = {
+    # Realistic intraday data (9:30 AM - 4:00 PM, 78 data points)
+    'dailyPrices': [98.5, 98.8, 99.2, 99.5, 99.8, 100.1, 100.3, 100.5, 100.8, 101.0,
+                   101.2, 101.5, 101.3, 101.1, 100.9, 101.2, 101.5, 101.8, 102.0, 102.3,
+                   102.5, 102.7, 103.0, 103.2, 103.0, 102.8, 102.5, 102.7, 103.0, 103.3,
+                   103.5, 103.8, 104.0, 104.2, 104.5, 104.3, 104.1, 103.9, 104.2, 104.5,
+                   104.8, 105.0, 105.2, 105.5, 105.7, 106.0, 106.2, 106.0, 105.8, 106.1,
+                   106.4, 106.7, 107.0, 107.2, 107.5, 107.3, 107.1, 107.4, 107.7, 108.0,
+                   108.2, 108.5, 108.7, 109.0, 108.8, 108.6, 108.9, 109.2, 109.5, 109.7,
+                   110.0, 110.2, 110.5, 110.7, 110.5, 110.3, 110.5, 110.8],
+    'dailyPricesLabels': ['9:30 AM', '9:50 AM', '10:10 AM', '10:30 AM', '10:50 AM', '11:10 AM', '11:30 AM', '11:50 AM',
+                         '12:10 PM', '12:30 PM', '12:50 PM', '1:10 PM', '1:30 PM', '1:50 PM', '2:10 PM', '2:30 PM',
+                         '2:50 PM', '3:10 PM', '3:30 PM', '3:50 PM'],
+    'weeklyPrices': [95.2, 97.5, 100.3, 103.8, 105.9, 108.2, 106.8],
+    'weeklyPricesLabels': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
+    'oneMonthPrices': [90.5, 92.0, 93.5, 95.0, 96.5, 98.0, 99.5, 101.0, 102.5, 104.0, 
+                      105.5, 107.0, 108.5, 110.0, 111.5, 113.0, 112.5, 112.0, 113.5, 115.0,
+                      116.5, 118.0, 117.5, 117.0, 118.5, 120.0, 119.5, 119.0, 120.5, 122.0],
+    'oneMonthPricesLabels': ['1', '2', '3', '4', '5', '6', '7', '8', '9', '10',
+                             '11', '12', '13', '14', '15', '16', '17', '18', '19', '20',
+                             '21', '22', '23', '24', '25', '26', '27', '28', '29', '30'],
+    'yearlyPrices': [80.0, 85.5, 90.0, 95.5, 100.0, 105.5, 110.0, 115.5, 120.0, 125.5, 130.0, 135.5],
+    'yearlyPricesLabels': ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'],
+    'allTimePrices': [50.0, 60.0, 70.0, 80.0, 90.0, 100.0, 110.0, 120.0, 130.0, 140.0],
+    'allTimePricesLabels': ['2020', '2021', '2022', '2023', '2024', '2025', '2026', '2027', '2028', '2029'],
+}
 
 # Fallback prices for when API is rate-limited
 FALLBACK_PRICES = {
@@ -117,35 +168,6 @@ FALLBACK_COMPANY_INFO = {
     },
 }
 
-def get_cached_or_fetch(url, cache_key):
-    """Get data from cache or fetch from API with rate limiting"""
-    current_time = time.time()
-    
-    # Check cache
-    if cache_key in api_cache:
-        data, timestamp = api_cache[cache_key]
-        if current_time - timestamp < CACHE_DURATION:
-            print(f"✅ Using cached data for {cache_key}")
-            return data
-    
-    # Add delay to respect rate limit (1 request per second)
-    time.sleep(1.1)
-    
-    # Fetch from API
-    print(f"🌐 Fetching from API: {cache_key}")
-    response = requests.get(url, timeout=10)
-    if response.status_code == 200:
-        data = response.json()
-        # Only cache if it's valid data (not a rate limit or error message)
-        if 'Note' not in data and 'Information' not in data:
-            api_cache[cache_key] = (data, current_time)
-            print(f"💾 Cached {cache_key}")
-        else:
-            print(f"⚠️  Not caching rate-limited response")
-        return data
-    return None
-
-
 def apply_fallback_data(ticker, stock_data):
     """Apply fallback data when API is rate-limited"""
     ticker_upper = ticker.upper()
@@ -157,7 +179,7 @@ def apply_fallback_data(ticker, stock_data):
         stock_data['price'] = fallback_price
         stock_data['percentChange'] = 1.5
         stock_data['percentText'] = '+1.50%'
-        print(f"📊 Using fallback price for {ticker}: ${fallback_price}")
+        logger.info("Using fallback price for %s: $%s", ticker, fallback_price)
     
     # Apply fallback company info if available
     if ticker_upper in FALLBACK_COMPANY_INFO:
@@ -172,7 +194,7 @@ def apply_fallback_data(ticker, stock_data):
         stock_data['peRatio'] = info['peRatio']
         stock_data['dividendYield'] = info['dividendYield']
         stock_data['homepage_url'] = info['homepage']
-        print(f"ℹ️  Using fallback company info for {ticker}: {info['name']}")
+        logger.info("Using fallback company info for %s: %s", ticker, info['name'])
     
     return stock_data
 
@@ -228,68 +250,343 @@ def get_stock_logo_url(ticker, company_name=None):
     }
 
 
-def fetch_intraday_data(ticker, api_key):
-    """Fetch intraday (5min) data for daily chart"""
-    try:
-        url = f"https://www.alphavantage.co/query?function=TIME_SERIES_INTRADAY&symbol={ticker}&interval=5min&apikey={api_key}"
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        
-        if 'Time Series (5min)' in data:
-            time_series = data['Time Series (5min)']
-            # Get data points during trading hours (9:30 AM - 4:00 PM ET)
-            prices = []
-            timestamps = []
-            
-            for timestamp in sorted(time_series.keys(), reverse=True):
-                # Parse timestamp
-                dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
-                hour = dt.hour
-                minute = dt.minute
-                
-                # Only include trading hours (9:30 - 16:00)
-                if (hour == 9 and minute >= 30) or (10 <= hour < 16):
-                    prices.append(float(time_series[timestamp]['4. close']))
-                    timestamps.append(timestamp)
-                    
-                if len(prices) >= 78:  # Full trading day (6.5 hours * 12 five-min intervals)
-                    break
-            
-            if len(prices) > 0:
-                return list(reversed(prices))  # Reverse to show chronologically
+def parse_global_quote(price_json):
+    """Pull price and percent change out of a GLOBAL_QUOTE response"""
+    if not price_json or 'Note' in price_json or 'Information' in price_json:
         return None
-    except Exception as e:
-        print(f"Error fetching intraday data: {e}")
+    global_quote = price_json.get('Global Quote', {})
+    if not global_quote or '05. price' not in global_quote:
         return None
-
-
-def fetch_daily_data(ticker, api_key, days=30):
-    """Fetch daily data for weekly/monthly charts"""
     try:
-        url = f"https://www.alphavantage.co/query?function=TIME_SERIES_DAILY&symbol={ticker}&apikey={api_key}"
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        
-        if 'Time Series (Daily)' in data:
-            time_series = data['Time Series (Daily)']
-            # Get last N days
-            prices = []
-            for timestamp in sorted(time_series.keys(), reverse=True)[:days]:
-                prices.append(float(time_series[timestamp]['4. close']))
-            return list(reversed(prices))  # Reverse to show chronologically
-        return None
-    except:
+        current_price = float(global_quote['05. price'])
+        prev_close = float(global_quote.get('08. previous close', 0))
+    except (ValueError, TypeError):
         return None
+    percent_change = ((current_price - prev_close) / prev_close) * 100 if prev_close else 0.0
+    return {
+        'currentPrice': current_price,
+        'percentChange': percent_change,
+        'percentText': f"{percent_change:+.2f}%",
+    }
+
+
+def fetch_quotes(tickers, api_key):
+    """
+    Resolve GLOBAL_QUOTE data for many tickers at once.
+    Cached quotes are used directly, the rest are fetched concurrently
+    on upstream_executor and admitted by the shared rate limiter. The
+    batch waits at most STOCK_FETCH_DEADLINE; quotes still missing by then
+    come from the caches even if stale, and queued fetches are cancelled
+    so they don't hold up get_stock on the shared executor.
+    """
+    quotes = {}
+    pending = {}
+    for ticker in tickers:
+        cached = get_cached(f"quote_{ticker}")
+        if cached is not None:
+            quotes[ticker] = cached
+        elif api_key:
+            pending[ticker] = upstream_executor.submit(
+                get_cached_or_fetch, f"quote_{ticker}", 'GLOBAL_QUOTE', symbol=ticker)
+
+    wait(pending.values(), timeout=STOCK_FETCH_DEADLINE)
+
+    for ticker, future in pending.items():
+        if future.done() and future.exception() is None:
+            quotes[ticker] = future.result()
+            continue
+        if future.done():
+            logger.warning("Quote fetch failed for %s: %s", ticker, future.exception())
+        else:
+            future.cancel()
+            logger.warning("quote_%s missed the deadline, using cached data", ticker)
+        quotes[ticker] = get_cached(f"quote_{ticker}", allow_expired=True)
+    return quotes
+
+
+def fetch_stock_sources(ticker):
+    """
+    Fetch OVERVIEW, GLOBAL_QUOTE and the intraday/daily bars for a ticker
+    concurrently under one deadline. Anything that has not arrived by then
+    is filled from whatever the caches and bar store hold, even if stale.
+    """
+    futures = {
+        'overview': upstream_executor.submit(
+            get_cached_or_fetch, f"overview_{ticker}", 'OVERVIEW', symbol=ticker),
+        'quote': upstream_executor.submit(
+            get_cached_or_fetch, f"quote_{ticker}", 'GLOBAL_QUOTE', symbol=ticker),
+        'intraday': upstream_executor.submit(ensure_bars, ticker, '5min'),
+        'daily': upstream_executor.submit(ensure_bars, ticker, 'daily'),
+    }
+    # What to serve for a source that failed or missed the deadline
+    fallbacks = {
+        'overview': lambda: get_cached(f"overview_{ticker}", allow_expired=True),
+        'quote': lambda: get_cached(f"quote_{ticker}", allow_expired=True),
+        # The chart ranges read whatever the bar store already holds
+        'intraday': lambda: None,
+        'daily': lambda: None,
+    }
+    wait(futures.values(), timeout=STOCK_FETCH_DEADLINE)
+
+    results = {}
+    for name, future in futures.items():
+        if future.done() and future.exception() is None:
+            results[name] = future.result()
+            continue
+        if future.done():
+            logger.warning("API error for %s_%s: %s", name, ticker, future.exception())
+        else:
+            # Don't leave a job that never started queued on the shared pool
+            future.cancel()
+            logger.warning("%s_%s missed the deadline, using cached data", name, ticker)
+        results[name] = fallbacks[name]()
+    return results
+
+
+def apply_company_overview(ticker, stock_data, company_json):
+    """Merge an OVERVIEW response into stock_data"""
+    if company_json and 'Symbol' in company_json and 'Note' not in company_json and 'Information' not in company_json:
+        company_name = company_json.get('Name', ticker)
+
+        # Parse market cap - it comes as a string
+        market_cap_str = company_json.get('MarketCapitalization', '1000000000')
+        try:
+            market_cap = int(float(market_cap_str)) if market_cap_str else 1000000000
+        except (ValueError, TypeError):
+            market_cap = 1000000000
+
+        # Parse PE Ratio
+        pe_ratio = company_json.get('PERatio', 'N/A')
+        if pe_ratio and pe_ratio != 'None':
+            try:
+                pe_ratio = float(pe_ratio)
+                pe_ratio = f"{pe_ratio:.2f}"
+            except (ValueError, TypeError):
+                pe_ratio = 'N/A'
+        else:
+            pe_ratio = 'N/A'
+
+        # Parse Dividend Yield
+        dividend_yield = company_json.get('DividendYield', 'N/A')
+        if dividend_yield and dividend_yield != 'None':
+            try:
+                dividend_yield = float(dividend_yield) * 100  # Convert to percentage
+                dividend_yield = f"{dividend_yield:.2f}%"
+            except (ValueError, TypeError):
+                dividend_yield = 'N/A'
+        else:
+            dividend_yield = 'N/A'
+
+        # Get average volume (from technical indicators or use 'Volume' if available)
+        avg_volume = company_json.get('AverageVolume', 'N/A')
+        if avg_volume and avg_volume != 'None':
+            try:
+                avg_volume = int(float(avg_volume))
+                # Format with commas
+                avg_volume = f"{avg_volume:,}"
+            except (ValueError, TypeError):
+                avg_volume = 'N/A'
+
+        stock_data.update({
+            'shortName': company_name,
+            'companyName': company_name,
+            'description': company_json.get('Description', f'Stock information for {ticker}'),
+            'marketCap': market_cap,
+            'marketCapFormatted': f"${market_cap / 1000000:.0f}M" if market_cap >= 1000000 else f"${market_cap / 1000:.0f}K",
+            'homepage_url': company_json.get('OfficialSite', ''),
+            'address': company_json.get('Address', 'N/A'),
+            'sector': company_json.get('Sector', 'N/A'),
+            'industry': company_json.get('Industry', 'N/A'),
+            'peRatio': pe_ratio,
+            'dividendYield': dividend_yield,
+            'averageVolume': avg_volume,
+            'eps': company_json.get('EPS', 'N/A'),
+            'beta': company_json.get('Beta', 'N/A'),
+            '52WeekHigh': company_json.get('52WeekHigh', 'N/A'),
+            '52WeekLow': company_json.get('52WeekLow', 'N/A'),
+        })
+        logger.debug("Updated %s with company data: market cap $%s, P/E %s, dividend yield %s",
+                     ticker, f"{market_cap:,}", pe_ratio, dividend_yield)
+
+
+def apply_price_quote(ticker, stock_data, price_json):
+    """Merge a GLOBAL_QUOTE response into stock_data, or fallback prices"""
+    if price_json:
+        logger.debug("Price API response keys for %s: %s", ticker, list(price_json))
+        global_quote = price_json.get('Global Quote', {})
+
+        # Check for API limit message
+        if 'Note' in price_json or 'Information' in price_json:
+            logger.warning("API %s for %s, using fallback price",
+                           'rate limit' if 'Note' in price_json else 'message', ticker)
+
+            # Use fallback price
+            if ticker in FALLBACK_PRICES:
+                fallback_price = FALLBACK_PRICES[ticker]
+                stock_data.update({
+                    'currentPrice': fallback_price,
+                    'price': fallback_price,
+                    'percentChange': 0.51,
+                    'percentText': '+0.51%'
+                })
+                logger.info("Using fallback price for %s: $%s", ticker, fallback_price)
+        elif global_quote:
+            current_price = float(global_quote.get('05. price', 100))
+            prev_close = float(global_quote.get('08. previous close', 100))
+            volume = global_quote.get('06. volume', 'N/A')
+
+            # Format volume if available
+            if volume and volume != 'N/A':
+                try:
+                    volume_int = int(volume)
+                    if volume_int >= 1000000:
+                        volume_formatted = f"{volume_int / 1000000:.2f}M"
+                    elif volume_int >= 1000:
+                        volume_formatted = f"{volume_int / 1000:.2f}K"
+                    else:
+                        volume_formatted = f"{volume_int:,}"
+                except (ValueError, TypeError):
+                    volume_formatted = 'N/A'
+            else:
+                volume_formatted = 'N/A'
+
+            if prev_close and prev_close != 0:
+                percent_change = ((current_price - prev_close) / prev_close) * 100
+                update_dict = {
+                    'currentPrice': current_price,
+                    'price': current_price,  # Alias for compatibility
+                    'percentChange': percent_change,  # Numeric value
+                    'percentText': f"{percent_change:+.2f}%"
+                }
+
+                # Only update volume if we didn't get it from company data
+                if stock_data.get('averageVolume') == 'N/A':
+                    update_dict['averageVolume'] = volume_formatted
+
+                stock_data.update(update_dict)
+                logger.debug("Updated %s with price data: $%s, volume %s",
+                             ticker, current_price, volume_formatted)
+        else:
+            logger.warning("No Global Quote data for %s, using fallback", ticker)
+            if ticker in FALLBACK_PRICES:
+                fallback_price = FALLBACK_PRICES[ticker]
+                stock_data.update({
+                    'currentPrice': fallback_price,
+                    'price': fallback_price,
+                    'percentChange': 0.51,
+                    'percentText': '+0.51%'
+                })
+                logger.info("Using fallback price for %s: $%s", ticker, fallback_price)
+    else:
+        logger.warning("Price API request failed for %s, using fallback", ticker)
+        if ticker in FALLBACK_PRICES:
+            fallback_price = FALLBACK_PRICES[ticker]
+            stock_data.update({
+                'currentPrice': fallback_price,
+                'price': fallback_price,
+                'percentChange': 0.51,
+                'percentText': '+0.51%'
+            })
+            logger.info("Using fallback price for %s: $%s", ticker, fallback_price)
+
+
+def apply_chart_ranges(ticker, stock_data, requested_range=None):
+    """Fill the price arrays from the chart-range engine, or the mock data"""
+    ranges = chart_ranges(ticker)
+    names = [requested_range] if requested_range else list(CHART_RANGES)
+    for name in names:
+        key = CHART_RANGES[name]
+        if name in ranges:
+            stock_data[key], stock_data[f"{key}Labels"] = ranges[name]
+        else:
+            stock_data[key] = MOCK_CHART_DATA[key]
+            stock_data[f"{key}Labels"] = MOCK_CHART_DATA[f"{key}Labels"]
+    real = [name for name in names if name in ranges]
+    if real:
+        logger.debug("Using real price data for %s: %s", ticker, ', '.join(real))
+
+
+@stocks.route('/cache/stats')
+@login_required
+def cache_stats():
+    """Hit/miss/eviction counters for this worker's caches and the shared cache"""
+    return jsonify({'cache': api_cache.stats(), 'sharedCache': shared_cache.stats()}), 200
+
+
+@stocks.route('/batch')
+@login_required
+@cache_control()
+def get_stock_batch():
+    """
+    Quotes for several tickers in one request: /api/stocks/batch?tickers=AAPL,MSFT
+    """
+    tickers = []
+    for ticker in request.args.get('tickers', '').split(','):
+        ticker = ticker.strip().upper()
+        if ticker and ticker not in tickers:
+            tickers.append(ticker)
+
+    if not tickers:
+        return {'error': 'No tickers provided'}, 400
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return {'error': f'Too many tickers (max {MAX_BATCH_TICKERS})'}, 400
+
+    # One query for every holding in the batch
+    holdings = {
+        stock.ticker: stock for stock in PortfolioStocks.query.filter(
+            PortfolioStocks.user_id == current_user.id,
+            PortfolioStocks.ticker.in_(tickers)).all()
+    }
+
+    quotes = fetch_quotes(tickers, os.getenv('ALPHA_VANTAGE_API_KEY'))
+
+    results = {}
+    for ticker in tickers:
+        holding = holdings.get(ticker)
+        quote = parse_global_quote(quotes.get(ticker))
+        if quote is None:
+            fallback_price = FALLBACK_PRICES.get(ticker)
+            quote = {
+                'currentPrice': fallback_price,
+                'percentChange': 0,
+                'percentText': '+0.00%',
+            }
+
+        overview = get_cached(f"overview_{ticker}") or {}
+        company_name = overview.get('Name') or FALLBACK_COMPANY_INFO.get(ticker, {}).get('name', ticker)
+        logo_urls = get_stock_logo_url(ticker)
+
+        results[ticker] = {
+            'ticker': ticker,
+            'companyName': company_name,
+            'logoUrl': logo_urls['primary'],
+            'logoFallback': logo_urls['fallback'],
+            'inPortfolio': holding is not None,
+            'shares': holding.share_count if holding else 0,
+            'basis': holding.basis if holding else 0,
+            **quote,
+        }
+
+    return negotiated({'stocks': results})
 
 
 @stocks.route('/<ticker>')
 @login_required
+@cache_control()
 def get_stock(ticker):
     try:
         ticker = ticker.upper()
         api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
+        try:
+            points = requested_points(request.args)
+        except ValueError as e:
+            return {'error': f"Invalid points: {e}"}, 400
+        # Only ship the range the client is displaying, when it says which
+        requested_range = request.args.get('range')
+        if requested_range and requested_range not in CHART_RANGES:
+            return {'error': f"Invalid range, expected one of: {', '.join(CHART_RANGES)}"}, 400
         
-        print(f"Processing request for ticker: {ticker}")
+        logger.debug("Processing request for ticker: %s", ticker)
         
         # Get logo URLs
         logo_urls = get_stock_logo_url(ticker)
@@ -321,31 +618,7 @@ def get_stock(ticker):
             'logoFallback': logo_urls['fallback'],
             'inPortfolio': False,
             'shares': 0,
-            'basis': 0,
-            # Realistic intraday data (9:30 AM - 4:00 PM, 78 data points)
-            'dailyPrices': [98.5, 98.8, 99.2, 99.5, 99.8, 100.1, 100.3, 100.5, 100.8, 101.0,
-                           101.2, 101.5, 101.3, 101.1, 100.9, 101.2, 101.5, 101.8, 102.0, 102.3,
-                           102.5, 102.7, 103.0, 103.2, 103.0, 102.8, 102.5, 102.7, 103.0, 103.3,
-                           103.5, 103.8, 104.0, 104.2, 104.5, 104.3, 104.1, 103.9, 104.2, 104.5,
-                           104.8, 105.0, 105.2, 105.5, 105.7, 106.0, 106.2, 106.0, 105.8, 106.1,
-                           106.4, 106.7, 107.0, 107.2, 107.5, 107.3, 107.1, 107.4, 107.7, 108.0,
-                           108.2, 108.5, 108.7, 109.0, 108.8, 108.6, 108.9, 109.2, 109.5, 109.7,
-                           110.0, 110.2, 110.5, 110.7, 110.5, 110.3, 110.5, 110.8],
-            'dailyPricesLabels': ['9:30 AM', '9:50 AM', '10:10 AM', '10:30 AM', '10:50 AM', '11:10 AM', '11:30 AM', '11:50 AM',
-                                 '12:10 PM', '12:30 PM', '12:50 PM', '1:10 PM', '1:30 PM', '1:50 PM', '2:10 PM', '2:30 PM',
-                                 '2:50 PM', '3:10 PM', '3:30 PM', '3:50 PM'],
-            'weeklyPrices': [95.2, 97.5, 100.3, 103.8, 105.9, 108.2, 106.8],
-            'weeklyPricesLabels': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
-            'oneMonthPrices': [90.5, 92.0, 93.5, 95.0, 96.5, 98.0, 99.5, 101.0, 102.5, 104.0, 
-                              105.5, 107.0, 108.5, 110.0, 111.5, 113.0, 112.5, 112.0, 113.5, 115.0,
-                              116.5, 118.0, 117.5, 117.0, 118.5, 120.0, 119.5, 119.0, 120.5, 122.0],
-            'oneMonthPricesLabels': ['1', '2', '3', '4', '5', '6', '7', '8', '9', '10',
-                                     '11', '12', '13', '14', '15', '16', '17', '18', '19', '20',
-                                     '21', '22', '23', '24', '25', '26', '27', '28', '29', '30'],
-            'yearlyPrices': [80.0, 85.5, 90.0, 95.5, 100.0, 105.5, 110.0, 115.5, 120.0, 125.5, 130.0, 135.5],
-            'yearlyPricesLabels': ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'],
-            'allTimePrices': [50.0, 60.0, 70.0, 80.0, 90.0, 100.0, 110.0, 120.0, 130.0, 140.0],
-            'allTimePricesLabels': ['2020', '2021', '2022', '2023', '2024', '2025', '2026', '2027', '2028', '2029']
+            'basis': 0
         }
         
         # Try to get portfolio data
@@ -359,210 +632,39 @@ def get_stock(ticker):
                     'shares': int(portfolio_stock.share_count) if portfolio_stock.share_count else 0,
                     'basis': float(portfolio_stock.basis) if portfolio_stock.basis else 0.0
                 })
-                print(f"Found portfolio data for {ticker}")
+                logger.debug("Found portfolio data for %s", ticker)
         except Exception as db_error:
-            print(f"Database error for {ticker}: {db_error}")
+            logger.warning("Database error for %s: %s", ticker, db_error)
             # Keep default portfolio values
         
         # Try to get API data (but don't fail if it doesn't work)
         if api_key:
             try:
-                # Get company details using Alpha Vantage
-                company_url = f"https://www.alphavantage.co/query?function=OVERVIEW&symbol={ticker}&apikey={api_key}"
-                print(f"Fetching company data from Alpha Vantage...")
-                
-                company_json = get_cached_or_fetch(company_url, f"overview_{ticker}")
-                
-                if company_json and 'Symbol' in company_json and 'Note' not in company_json and 'Information' not in company_json:
-                    company_name = company_json.get('Name', ticker)
-                    
-                    # Parse market cap - it comes as a string
-                    market_cap_str = company_json.get('MarketCapitalization', '1000000000')
-                    try:
-                        market_cap = int(float(market_cap_str)) if market_cap_str else 1000000000
-                    except (ValueError, TypeError):
-                        market_cap = 1000000000
-                    
-                    # Parse PE Ratio
-                    pe_ratio = company_json.get('PERatio', 'N/A')
-                    if pe_ratio and pe_ratio != 'None':
-                        try:
-                            pe_ratio = float(pe_ratio)
-                            pe_ratio = f"{pe_ratio:.2f}"
-                        except (ValueError, TypeError):
-                            pe_ratio = 'N/A'
-                    else:
-                        pe_ratio = 'N/A'
-                    
-                    # Parse Dividend Yield
-                    dividend_yield = company_json.get('DividendYield', 'N/A')
-                    if dividend_yield and dividend_yield != 'None':
-                        try:
-                            dividend_yield = float(dividend_yield) * 100  # Convert to percentage
-                            dividend_yield = f"{dividend_yield:.2f}%"
-                        except (ValueError, TypeError):
-                            dividend_yield = 'N/A'
-                    else:
-                        dividend_yield = 'N/A'
-                    
-                    # Get average volume (from technical indicators or use 'Volume' if available)
-                    avg_volume = company_json.get('AverageVolume', 'N/A')
-                    if avg_volume and avg_volume != 'None':
-                        try:
-                            avg_volume = int(float(avg_volume))
-                            # Format with commas
-                            avg_volume = f"{avg_volume:,}"
-                        except (ValueError, TypeError):
-                            avg_volume = 'N/A'
-                    
-                    stock_data.update({
-                        'shortName': company_name,
-                        'companyName': company_name,
-                        'description': company_json.get('Description', f'Stock information for {ticker}'),
-                        'marketCap': market_cap,
-                        'marketCapFormatted': f"${market_cap / 1000000:.0f}M" if market_cap >= 1000000 else f"${market_cap / 1000:.0f}K",
-                        'homepage_url': company_json.get('OfficialSite', ''),
-                        'address': company_json.get('Address', 'N/A'),
-                        'sector': company_json.get('Sector', 'N/A'),
-                        'industry': company_json.get('Industry', 'N/A'),
-                        'peRatio': pe_ratio,
-                        'dividendYield': dividend_yield,
-                        'averageVolume': avg_volume,
-                        'eps': company_json.get('EPS', 'N/A'),
-                        'beta': company_json.get('Beta', 'N/A'),
-                        '52WeekHigh': company_json.get('52WeekHigh', 'N/A'),
-                        '52WeekLow': company_json.get('52WeekLow', 'N/A'),
-                    })
-                    print(f"Updated with company data for {ticker}")
-                    print(f"  Market Cap: ${market_cap:,}")
-                    print(f"  PE Ratio: {pe_ratio}")
-                    print(f"  Dividend Yield: {dividend_yield}")
-                    print(f"  Homepage: {company_json.get('OfficialSite', 'N/A')}")
-                
-                # Get price data using Alpha Vantage Global Quote
-                quote_url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={ticker}&apikey={api_key}"
-                print(f"Fetching price data...")
-                price_json = get_cached_or_fetch(quote_url, f"quote_{ticker}")
-                
-                price_updated = False
-                if price_json:
-                    print(f"Price API Response keys: {price_json.keys()}")
-                    global_quote = price_json.get('Global Quote', {})
-                    
-                    # Check for API limit message
-                    if 'Note' in price_json or 'Information' in price_json:
-                        if 'Note' in price_json:
-                            print(f"⚠️  API Rate Limit, using fallback price")
-                        else:
-                            print(f"⚠️  API Message, using fallback price")
-                        
-                        # Use fallback price
-                        if ticker in FALLBACK_PRICES:
-                            fallback_price = FALLBACK_PRICES[ticker]
-                            stock_data.update({
-                                'currentPrice': fallback_price,
-                                'price': fallback_price,
-                                'percentChange': 0.51,
-                                'percentText': '+0.51%'
-                            })
-                            print(f"💰 Using fallback price for {ticker}: ${fallback_price}")
-                            price_updated = True
-                    elif global_quote:
-                        current_price = float(global_quote.get('05. price', 100))
-                        prev_close = float(global_quote.get('08. previous close', 100))
-                        volume = global_quote.get('06. volume', 'N/A')
-                        
-                        # Format volume if available
-                        if volume and volume != 'N/A':
-                            try:
-                                volume_int = int(volume)
-                                if volume_int >= 1000000:
-                                    volume_formatted = f"{volume_int / 1000000:.2f}M"
-                                elif volume_int >= 1000:
-                                    volume_formatted = f"{volume_int / 1000:.2f}K"
-                                else:
-                                    volume_formatted = f"{volume_int:,}"
-                            except (ValueError, TypeError):
-                                volume_formatted = 'N/A'
-                        else:
-                            volume_formatted = 'N/A'
-                        
-                        if prev_close and prev_close != 0:
-                            percent_change = ((current_price - prev_close) / prev_close) * 100
-                            update_dict = {
-                                'currentPrice': current_price,
-                                'price': current_price,  # Alias for compatibility
-                                'percentChange': percent_change,  # Numeric value
-                                'percentText': f"{percent_change:+.2f}%"
-                            }
-                            
-                            # Only update volume if we didn't get it from company data
-                            if stock_data.get('averageVolume') == 'N/A':
-                                update_dict['averageVolume'] = volume_formatted
-                            
-                            stock_data.update(update_dict)
-                            print(f"✅ Updated with price data for {ticker}: ${current_price}")
-                            print(f"  Volume: {volume_formatted}")
-                            price_updated = True
-                    else:
-                        print(f"⚠️  No Global Quote data, using fallback")
-                        if ticker in FALLBACK_PRICES:
-                            fallback_price = FALLBACK_PRICES[ticker]
-                            stock_data.update({
-                                'currentPrice': fallback_price,
-                                'price': fallback_price,
-                                'percentChange': 0.51,
-                                'percentText': '+0.51%'
-                            })
-                            print(f"💰 Using fallback price for {ticker}: ${fallback_price}")
-                            price_updated = True
-                else:
-                    print(f"❌ Price API request failed, using fallback")
-                    if ticker in FALLBACK_PRICES:
-                        fallback_price = FALLBACK_PRICES[ticker]
-                        stock_data.update({
-                            'currentPrice': fallback_price,
-                            'price': fallback_price,
-                            'percentChange': 0.51,
-                            'percentText': '+0.51%'
-                        })
-                        print(f"💰 Using fallback price for {ticker}: ${fallback_price}")
-                        price_updated = True
-                
-                # Fetch chart data (intraday for daily view)
-                print(f"Fetching chart data for {ticker}...")
-                daily_data = fetch_intraday_data(ticker, api_key)
-                if daily_data and len(daily_data) > 5:
-                    stock_data['dailyPrices'] = daily_data
-                    print(f"✅ Fetched {len(daily_data)} intraday prices")
-                
-                # Fetch weekly/monthly data (daily time series)
-                daily_time_series = fetch_daily_data(ticker, api_key, days=30)
-                if daily_time_series and len(daily_time_series) >= 7:
-                    # Weekly: last 7 days
-                    stock_data['weeklyPrices'] = daily_time_series[-7:]
-                    # Monthly: last 30 days
-                    stock_data['oneMonthPrices'] = daily_time_series
-                    # Yearly/All-time: use monthly data sampled
-                    if len(daily_time_series) >= 12:
-                        # Sample every ~3 days for yearly view
-                        stock_data['yearlyPrices'] = daily_time_series[::3][:10]
-                        stock_data['allTimePrices'] = daily_time_series[::3][:10]
-                    print(f"✅ Fetched daily time series data")
-                
-            except requests.RequestException as api_error:
-                print(f"API request failed for {ticker}: {api_error}")
+                # The four upstream calls are independent, so run them side by side
+                logger.debug("Fetching company, price and chart data for %s", ticker)
+                sources = fetch_stock_sources(ticker)
+                apply_company_overview(ticker, stock_data, sources['overview'])
+                apply_price_quote(ticker, stock_data, sources['quote'])
             except Exception as api_error:
-                print(f"API error for {ticker}: {api_error}")
+                logger.warning("API error for %s: %s", ticker, api_error)
         else:
-            print("No API key found, using mock data")
+            logger.debug("No API key found, using mock data")
+
+        # Every range comes from the bar store; ranges without data stay mocked
+        apply_chart_ranges(ticker, stock_data, requested_range)
+
+        # Downsample each price series to what the client will actually draw
+        if points:
+            for name in ([requested_range] if requested_range else CHART_RANGES):
+                key = CHART_RANGES[name]
+                stock_data[key], stock_data[f"{key}Labels"] = lttb(
+                    stock_data[key], stock_data[f"{key}Labels"], points)
         
-        print(f"Returning data for {ticker}: {stock_data['shortName']} @ ${stock_data['currentPrice']}")
-        return jsonify(stock_data), 200
+        logger.debug("Returning data for %s: %s @ $%s", ticker, stock_data['shortName'], stock_data['currentPrice'])
+        return negotiated(stock_data)
         
-    except Exception as e:
-        print(f"CRITICAL ERROR for {ticker}: {e}")
-        print(f"Traceback: {traceback.format_exc()}")
+    except Exception:
+        logger.exception("Failed to build stock data for %s", ticker if 'ticker' in locals() else '?')
         
         # Return absolute minimum fallback data
         return jsonify({
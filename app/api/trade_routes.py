@@ -0,0 +1,177 @@
+import logging
+import math
+import os
+from flask import Blueprint, request
+from flask_login import login_required, current_user
+from sqlalchemy import Numeric, cast, func, update
+from app.models import db, upsert, PortfolioStocks, User
+from app.market_data import market_price
+from app.user_cache import forget_user, remember_user
+from .stocks import FALLBACK_PRICES
+
+# POST api/trades/   {ticker, side: 'buy' | 'sell', quantity, price?}
+# Trades fill at the server's quote; `price` is the price the client saw and
+# only guards against the quote having moved since.
+
+# Largest fraction the quote may differ from the client's price before a trade is refused
+TRADE_PRICE_TOLERANCE = float(os.getenv('TRADE_PRICE_TOLERANCE', 0.02))
+
+trade_routes = Blueprint('trades', __name__)
+logger = logging.getLogger(__name__)
+
+
+class TradeError(Exception):
+    """A trade that can't go through, e.g. not enough cash or shares"""
+    status = 400
+
+
+class PriceUnavailable(TradeError):
+    """No quote to price the trade at"""
+    status = 503
+
+
+class PriceMoved(TradeError):
+    """The quote is too far from the price the client agreed to"""
+    status = 409
+
+
+def parse_quantity(value):
+    """Whole number of shares, at least 1"""
+    try:
+        quantity = int(value)
+    except (ValueError, TypeError):
+        raise TradeError('Invalid quantity')
+    if quantity < 1:
+        raise TradeError('Quantity must be at least 1 share')
+    return quantity
+
+
+def _positive_price(value):
+    try:
+        price = float(value)
+    except (ValueError, TypeError):
+        return None
+    # NaN and infinity would poison cash_balance
+    return price if math.isfinite(price) and price > 0 else None
+
+
+def quoted_price(ticker):
+    """
+    The server's price for a ticker: the latest quote, or without an API
+    key the same fallback price the stock page shows
+    """
+    if not os.getenv('ALPHA_VANTAGE_API_KEY'):
+        return FALLBACK_PRICES.get(ticker)
+    return _positive_price(market_price(ticker))
+
+
+def trade_price(ticker, expected=None):
+    """
+    Price to fill a trade at. Always the server's quote; `expected`, the
+    price the client saw, only has to be within TRADE_PRICE_TOLERANCE of it.
+    """
+    if expected is not None:
+        expected = _positive_price(expected)
+        if expected is None:
+            raise TradeError('Invalid price')
+
+    price = quoted_price(ticker)
+    if price is None:
+        raise PriceUnavailable(f"No price available for {ticker} right now")
+    if expected is not None and abs(price - expected) > price * TRADE_PRICE_TOLERANCE:
+        raise PriceMoved(f"{ticker} is now ${price:.2f}, too far from ${expected:.2f}; "
+                         f"review the new price and try again")
+    return price
+
+
+def _money(expression):
+    """Round a SQL amount to cents (Postgres only rounds NUMERIC to n places)"""
+    return func.round(cast(expression, Numeric), 2)
+
+
+def execute_trade(user_id, ticker, side, quantity, price):
+    """
+    Buy or sell `quantity` shares at `price` in one transaction. The cash
+    and share checks are part of the UPDATEs themselves (e.g. `SET
+    cash_balance = cash_balance - :cost WHERE cash_balance >= :cost`), so
+    two trades racing from different tabs can never overdraw the balance
+    or sell shares twice. Returns the updated position and user.
+    """
+    cost = round(price * quantity, 2)
+    try:
+        if side == 'buy':
+            debit = db.session.execute(
+                update(User)
+                .where(User.id == user_id, User.cash_balance >= cost)
+                .values(cash_balance=_money(User.cash_balance - cost))
+                .execution_options(synchronize_session=False))
+            if debit.rowcount == 0:
+                raise TradeError('Insufficient funds')
+
+            # New position, or average into the existing one
+            held = PortfolioStocks.share_count
+            db.session.execute(
+                upsert(PortfolioStocks)
+                .values(ticker=ticker, basis=price, share_count=quantity, user_id=user_id)
+                .on_conflict_do_update(
+                    index_elements=['user_id', 'ticker'],
+                    set_={'share_count': held + quantity,
+                          'basis': _money((held * PortfolioStocks.basis + cost) / (held + quantity))}))
+
+        elif side == 'sell':
+            sold = db.session.execute(
+                update(PortfolioStocks)
+                .where(PortfolioStocks.user_id == user_id,
+                       PortfolioStocks.ticker == ticker,
+                       PortfolioStocks.share_count >= quantity)
+                .values(share_count=PortfolioStocks.share_count - quantity)
+                .execution_options(synchronize_session=False))
+            if sold.rowcount == 0:
+                raise TradeError('Cannot sell - not enough shares to sell')
+            db.session.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(cash_balance=_money(func.coalesce(User.cash_balance, 0) + cost))
+                .execution_options(synchronize_session=False))
+
+        else:
+            raise TradeError('Invalid side')
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    # The cash UPDATEs bypass the ORM, so drop the cached user as soon as
+    # they commit, in case anything below fails
+    forget_user(user_id)
+
+    position = PortfolioStocks.query.filter(
+        PortfolioStocks.user_id == user_id,
+        PortfolioStocks.ticker == ticker).one()
+    user = User.query.populate_existing().get(user_id)
+    remember_user(user)
+    logger.info("Trade executed", extra={
+        'user_id': user_id, 'ticker': ticker, 'side': side, 'quantity': quantity, 'price': price,
+        'share_count': position.share_count, 'cash_balance': user.cash_balance})
+    return position, user
+
+
+@trade_routes.route('/', methods=['POST'])
+@login_required
+def trade():
+    """Executes a buy or sell and returns the new position and balance together"""
+    data = request.get_json(silent=True) or {}
+    ticker = str(data.get('ticker', '')).upper()
+    side = data.get('side')
+    if not ticker:
+        return {'error': 'Ticker is required'}, 400
+    if side not in ('buy', 'sell'):
+        return {'error': "Side must be 'buy' or 'sell'"}, 400
+
+    try:
+        quantity = parse_quantity(data.get('quantity', 1))
+        price = trade_price(ticker, data.get('price'))
+        position, user = execute_trade(current_user.id, ticker, side, quantity, price)
+    except TradeError as e:
+        return {'error': str(e)}, e.status
+    return {'position': position.to_dict(), 'user': user.to_dict()}
@@ -1,17 +1,18 @@
+import logging
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 from sqlalchemy.orm import query
 from app.models import User, db
+from app.user_cache import forget_user, remember_user
 
 user_routes = Blueprint('users', __name__)
+logger = logging.getLogger(__name__)
 
 
 @user_routes.route('/balance/<amount>/<operator>', methods=['POST', 'PUT', 'OPTIONS'])
 @login_required
 def user_balance(amount, operator):
-    print(f"=== USER BALANCE REQUEST ===")
-    print(f"Amount: {amount}, Operator: {operator}")
-    print(f"Request method: {request.method}")
+    logger.debug("Balance request: %s %s (%s)", operator, amount, request.method)
     
     try:
         amount = float(amount)
@@ -26,16 +27,20 @@ def user_balance(amount, operator):
     
     if operator == 'add':
         user.cash_balance += amount
-        print(f"Adding ${amount}, new balance: ${user.cash_balance}")
+        logger.info("Adding $%s for user %s, new balance: $%s", amount, user.id, user.cash_balance)
     elif operator == 'subtract':
         user.cash_balance -= amount
-        print(f"Subtracting ${amount}, new balance: ${user.cash_balance}")
+        logger.info("Subtracting $%s for user %s, new balance: $%s", amount, user.id, user.cash_balance)
     else:
         return {'error': 'Invalid operator'}, 400
     
     db.session.add(user)
-    db.session.commit()
-    print("Balance updated successfully")
+    try:
+        db.session.commit()
+    finally:
+        # Whatever the outcome, the cached balance can't be trusted any more
+        forget_user(user.id)
+    remember_user(user)
     return jsonify(user.to_dict())
 
 
@@ -1,6 +1,6 @@
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
-from app.models import WatchlistStocks, db, watchlist_stocks
+from app.models import WatchlistStocks, db, upsert, watchlist_stocks
 from sqlalchemy.orm import query
 
 # GET api/watchlist-stocks/		------ backend good => double check front end
@@ -33,19 +33,13 @@ def watchlist_edit(ticker):
         return deleted_stock.to_dict()
 
     elif request.method == 'POST':
-        stock_already_in_watchlist = WatchlistStocks.query.filter(
+        # The (user_id, ticker) unique index makes a repeat add a no-op
+        db.session.execute(
+            upsert(WatchlistStocks)
+            .values(ticker=ticker, user_id=current_user.id)
+            .on_conflict_do_nothing(index_elements=['user_id', 'ticker']))
+        db.session.commit()
+        watched_stock = WatchlistStocks.query.filter(
             WatchlistStocks.user_id == current_user.id,
-            WatchlistStocks.ticker == ticker
-        ).one_or_none()
-
-        if stock_already_in_watchlist:
-            return stock_already_in_watchlist.to_dict()
-        else:
-            # check if the ticker exists
-            watched_stock = WatchlistStocks(
-                ticker=ticker,
-                user_id=current_user.id
-            )
-            db.session.add(watched_stock)
-            db.session.commit()
-            return watched_stock.to_dict()
+            WatchlistStocks.ticker == ticker).one()
+        return watched_stock.to_dict()
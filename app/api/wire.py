@@ -0,0 +1,57 @@
+from flask import jsonify, make_response, request
+import numpy as np
+
+# MessagePack is optional; without it every client gets JSON
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MIMETYPE = 'application/x-msgpack'
+
+
+def wants_msgpack():
+    """True when the client prefers MessagePack over JSON and we can produce it"""
+    if msgpack is None:
+        return False
+    best = request.accept_mimetypes.best_match(['application/json', MSGPACK_MIMETYPE])
+    return best == MSGPACK_MIMETYPE
+
+
+def _pack_column(value):
+    """
+    numpy columns go over MessagePack as raw little-endian buffers tagged
+    with their dtype ('<i8', '<f4'), so the browser can wrap them in a typed
+    array (BigInt64Array, Float32Array) without parsing numbers. Prices are
+    sent as float32, which is plenty for a chart and halves the bytes.
+    """
+    if isinstance(value, np.ndarray):
+        dtype = np.float32 if value.dtype.kind == 'f' else value.dtype
+        column = value.astype(np.dtype(dtype).newbyteorder('<'), copy=False)
+        return {'dtype': column.dtype.str, 'data': column.tobytes()}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _jsonable(value):
+    """Swap numpy columns for plain lists so jsonify can encode them"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    return value
+
+
+def negotiated(payload, status=200):
+    """
+    Respond with MessagePack or JSON depending on the Accept header.
+    Payloads may hold numpy arrays as columns; JSON clients get them as lists.
+    """
+    if wants_msgpack():
+        response = make_response(msgpack.packb(payload, default=_pack_column), status)
+        response.mimetype = MSGPACK_MIMETYPE
+    else:
+        response = make_response(jsonify(_jsonable(payload)), status)
+    response.vary.add('Accept')
+    return response
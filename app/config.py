@@ -13,4 +13,26 @@ class Config:
     if database_url and database_url.startswith('postgres://'):
         database_url = database_url.replace('postgres://', 'postgresql://', 1)
     SQLALCHEMY_DATABASE_URI = database_url
-    SQLALCHEMY_ECHO = True
+    # Every worker process has its own pool, so the app can open up to
+    # WEB_CONCURRENCY x (pool_size + max_overflow) connections. By default
+    # that product is kept within DB_MAX_CONNECTIONS (Heroku's smallest
+    # Postgres plans allow 20). Under gevent many greenlets share a pool, so
+    # waiting for a connection is capped by pool_timeout instead of hanging,
+    # and connections dropped by the server are detected before use.
+    if database_url and database_url.startswith('postgresql'):
+        workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+        connections_per_worker = max(
+            int(os.environ.get('DB_MAX_CONNECTIONS', 20)) // workers, 1)
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', connections_per_worker)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 0)),
+            'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+            'pool_pre_ping': True,
+        }
+    # Logging every statement is for local debugging only
+    SQLALCHEMY_ECHO = os.environ.get('SQLALCHEMY_ECHO', 'false').lower() == 'true'
+    # CSRF tokens expire after WTF_CSRF_TIME_LIMIT seconds; the cookie is
+    # reissued once a token is within CSRF_REFRESH_MARGIN seconds of that
+    WTF_CSRF_TIME_LIMIT = int(os.environ.get('WTF_CSRF_TIME_LIMIT', 3600))
+    CSRF_REFRESH_MARGIN = int(os.environ.get('CSRF_REFRESH_MARGIN', 600))
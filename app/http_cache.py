@@ -0,0 +1,90 @@
+import gzip
+import hashlib
+import os
+from functools import wraps
+
+from flask import make_response, request
+
+# Brotli is optional; without it clients that ask for it get gzip instead
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this aren't worth compressing
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 5))
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'application/x-msgpack',
+    'image/svg+xml',
+}
+
+
+def cache_control(max_age=None, public=False):
+    """
+    Cache-Control for a GET route. Without max_age clients must revalidate
+    every time, which is still cheap because every response carries an ETag.
+    Anything that depends on the logged-in user should stay private.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                if public:
+                    response.cache_control.public = True
+                else:
+                    response.cache_control.private = True
+                if max_age is None:
+                    response.cache_control.no_cache = True
+                else:
+                    response.cache_control.max_age = max_age
+            return response
+        return wrapper
+    return decorator
+
+
+def _pick_encoding(response):
+    if response.content_length is not None and response.content_length < COMPRESS_MIN_SIZE:
+        return None
+    if not (response.mimetype.startswith('text/') or response.mimetype in COMPRESSIBLE_MIMETYPES):
+        return None
+    offered = ['br', 'gzip'] if brotli else ['gzip']
+    encoding = request.accept_encodings.best_match(offered)
+    return encoding if encoding and request.accept_encodings[encoding] else None
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def conditional_response(response):
+    """
+    after_request hook: strong ETag + If-None-Match (304) for successful
+    GETs, then gzip/brotli for compressible bodies over COMPRESS_MIN_SIZE.
+    The ETag is a hash of the uncompressed payload with the encoding
+    appended, so each representation validates separately.
+    """
+    if (request.method not in ('GET', 'HEAD') or response.status_code != 200
+            or response.direct_passthrough or 'Content-Encoding' in response.headers):
+        return response
+
+    data = response.get_data()
+    encoding = _pick_encoding(response)
+    response.vary.add('Accept-Encoding')
+
+    etag = hashlib.sha1(data).hexdigest()
+    response.set_etag(f"{etag}-{encoding}" if encoding else etag)
+    response.make_conditional(request)
+    if response.status_code == 304 or not encoding:
+        return response
+
+    response.set_data(_compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,108 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+DEVELOPMENT = os.environ.get('FLASK_ENV') == 'development'
+
+# Per-environment defaults; every setting can be overridden from the env
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG' if DEVELOPMENT else 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text' if DEVELOPMENT else 'json')
+# Fraction of DEBUG/INFO records kept; warnings and errors are never sampled
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any `extra=` fields as top-level keys"""
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only `rate` of the records below WARNING"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class ForkSafeQueueHandler(QueueHandler):
+    """
+    Hands records to a background thread so request threads never block on
+    stdout. The thread doesn't survive a fork (gunicorn --preload), so a
+    worker that finds itself in a new process starts its own listener.
+    """
+
+    def __init__(self, target):
+        super().__init__(None)
+        self.target = target
+        self._start()
+
+    def _start(self):
+        self.pid = os.getpid()
+        self.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def enqueue(self, record):
+        if os.getpid() != self.pid:
+            self._start()
+        super().enqueue(record)
+
+    def prepare(self, record):
+        """
+        Merge the args into the message but keep exc_info, unlike the base
+        class, so the output formatter renders the traceback itself (as the
+        "exc" field in JSON) instead of finding it folded into the message
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging():
+    """Route the root logger through a non-blocking queue to stdout"""
+    root = logging.getLogger()
+    if any(isinstance(handler, ForkSafeQueueHandler) for handler in root.handlers):
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == 'json':
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)-7s %(name)s: %(message)s', '%H:%M:%S'))
+
+    handler = ForkSafeQueueHandler(stream)
+    if LOG_SAMPLE_RATE < 1:
+        handler.addFilter(SamplingFilter(LOG_SAMPLE_RATE))
+
+    root.handlers = [handler]
+    root.setLevel(LOG_LEVEL)
+    # urllib3 logs every pooled connection at DEBUG
+    logging.getLogger('urllib3').setLevel(logging.WARNING)
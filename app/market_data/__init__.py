@@ -0,0 +1,9 @@
+from .rate_limiter import TokenBucket, alpha_vantage_limiter
+from .client import AlphaVantageClient, RateLimited, alpha_vantage
+from .cache import LRUCache
+from .disk_cache import SharedCache
+from .singleflight import SingleFlight
+from .fetch import api_cache, shared_cache, get_cached, get_cached_or_fetch, market_price
+from .series import Bars, parse_time_series
+from .bars import BarStore, bar_store, ensure_bars, get_bars
+from .prefetch import prefetch
@@ -0,0 +1,188 @@
+import logging
+import os
+import time
+
+from .client import RateLimited, alpha_vantage
+from .fetch import CACHE_TTLS, fetch_coalescer, run_in_background
+from .market_hours import expires_at
+from .rate_limiter import MARKET_DATA_DIR
+from .series import SERIES, Bars, parse_time_series
+from .sqlite_file import SQLiteFile
+
+logger = logging.getLogger(__name__)
+
+# Store freshness follows the cache policy for the matching data type
+SERIES_DATA_TYPES = {'daily': 'daily', '5min': 'intraday'}
+
+# Intraday bars older than this are pruned; daily history is kept forever
+INTRADAY_RETENTION_DAYS = int(os.environ.get('INTRADAY_RETENTION_DAYS', 30))
+# 'compact' returns the latest 100 bars; only ask for full history when enabled
+FULL_HISTORY = os.environ.get('ALPHA_VANTAGE_FULL_HISTORY', 'false').lower() == 'true'
+
+
+class BarStore:
+    """
+    OHLCV bars per (ticker, interval) in a SQLite WAL file shared by every
+    worker, plus the time each series was last topped up from upstream and
+    any spans that upstream could no longer fill in.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(MARKET_DATA_DIR, 'bars.sqlite')
+        self.db = SQLiteFile(self.path, [
+            'CREATE TABLE IF NOT EXISTS bars ('
+            'ticker TEXT NOT NULL, interval TEXT NOT NULL, ts INTEGER NOT NULL, '
+            'open REAL NOT NULL, high REAL NOT NULL, low REAL NOT NULL, '
+            'close REAL NOT NULL, volume INTEGER NOT NULL, '
+            'PRIMARY KEY (ticker, interval, ts)) WITHOUT ROWID',
+            'CREATE TABLE IF NOT EXISTS series ('
+            'ticker TEXT NOT NULL, interval TEXT NOT NULL, refreshed_at REAL NOT NULL, '
+            'PRIMARY KEY (ticker, interval)) WITHOUT ROWID',
+            'CREATE TABLE IF NOT EXISTS gaps ('
+            'ticker TEXT NOT NULL, interval TEXT NOT NULL, '
+            'start_ts INTEGER NOT NULL, end_ts INTEGER NOT NULL, '
+            'PRIMARY KEY (ticker, interval, start_ts)) WITHOUT ROWID'])
+
+    def bars(self, ticker, interval, since=None):
+        """Bars for a series in time order, optionally only those at or after `since`"""
+        return Bars.from_rows(self.db.execute(
+            'SELECT ts, open, high, low, close, volume FROM bars '
+            'WHERE ticker = ? AND interval = ? AND ts >= ? ORDER BY ts',
+            (ticker, interval, since or 0)))
+
+    def last_timestamp(self, ticker, interval):
+        rows = self.db.execute(
+            'SELECT MAX(ts) FROM bars WHERE ticker = ? AND interval = ?',
+            (ticker, interval))
+        return rows[0][0]
+
+    def gaps(self, ticker, interval):
+        """(start, end) spans with no stored bars between them, oldest first"""
+        return self.db.execute(
+            'SELECT start_ts, end_ts FROM gaps WHERE ticker = ? AND interval = ? ORDER BY start_ts',
+            (ticker, interval))
+
+    def record_gap(self, ticker, interval, start, end):
+        self.db.execute(
+            'INSERT OR REPLACE INTO gaps (ticker, interval, start_ts, end_ts) VALUES (?, ?, ?, ?)',
+            (ticker, interval, int(start), int(end)))
+
+    def refreshed_at(self, ticker, interval):
+        rows = self.db.execute(
+            'SELECT refreshed_at FROM series WHERE ticker = ? AND interval = ?',
+            (ticker, interval))
+        return rows[0][0] if rows else None
+
+    def is_fresh(self, ticker, interval):
+        refreshed_at = self.refreshed_at(ticker, interval)
+        if refreshed_at is None:
+            return False
+        data_type = SERIES_DATA_TYPES[interval]
+        return time.time() < expires_at(data_type, CACHE_TTLS[data_type], refreshed_at)
+
+    def upsert(self, ticker, interval, bars):
+        """Insert or overwrite bars and mark the series as refreshed now"""
+        self.db.run(lambda conn: self._upsert_in(conn, ticker, interval, bars))
+
+    def _upsert_in(self, conn, ticker, interval, bars):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT OR REPLACE INTO bars (ticker, interval, ts, open, high, low, close, volume) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(ticker, interval) + row for row in bars.rows()])
+            if len(bars):
+                # Bars spanning a recorded gap fill it in
+                conn.execute(
+                    'DELETE FROM gaps WHERE ticker = ? AND interval = ? AND start_ts >= ? AND end_ts <= ?',
+                    (ticker, interval, int(bars.ts[0]), int(bars.ts[-1])))
+            if interval != 'daily' and len(bars):
+                cutoff = int(bars.ts[-1]) - INTRADAY_RETENTION_DAYS * 86400
+                conn.execute(
+                    'DELETE FROM bars WHERE ticker = ? AND interval = ? AND ts < ?',
+                    (ticker, interval, cutoff))
+            conn.execute(
+                'INSERT OR REPLACE INTO series (ticker, interval, refreshed_at) VALUES (?, ?, ?)',
+                (ticker, interval, time.time()))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+
+bar_store = BarStore()
+
+
+def sync_bars(ticker, interval):
+    """
+    Download only the missing tail of a series and merge it into the store.
+    The latest stored bar is re-written too, since today's bar is still
+    forming while the market is open.
+
+    When even the oldest downloaded bar is newer than the stored tail, the
+    bars in between are missing. They are fetched with full history when
+    that is enabled; otherwise the span is recorded as a gap.
+    """
+    if bar_store.is_fresh(ticker, interval):
+        return
+    last_ts = bar_store.last_timestamp(ticker, interval)
+    outputsize = 'full' if (FULL_HISTORY and last_ts is None) else 'compact'
+    bars = _download(ticker, interval, outputsize)
+    if bars is None:
+        return
+
+    if last_ts is not None and len(bars) and bars.ts[0] > last_ts:
+        if FULL_HISTORY and outputsize != 'full':
+            logger.info("Stored %s bars for %s end before the compact window, fetching full history",
+                        interval, ticker)
+            bars = _download(ticker, interval, 'full') or bars
+        if bars.ts[0] > last_ts:
+            logger.warning("No %s bars for %s between %d and %d, recording the gap",
+                           interval, ticker, last_ts, bars.ts[0])
+            bar_store.record_gap(ticker, interval, last_ts, bars.ts[0])
+
+    if last_ts is not None:
+        bars = bars.since(last_ts)
+    if len(bars):
+        bar_store.upsert(ticker, interval, bars)
+        logger.info("Stored %d new %s bars for %s", len(bars), interval, ticker)
+
+
+def _download(ticker, interval, outputsize):
+    """Bars for a series from upstream, or None once the rate budget is spent"""
+    function, params, _ = SERIES[interval]
+    logger.info("Syncing %s bars for %s (%s)", interval, ticker, outputsize)
+    try:
+        data = alpha_vantage.query(function, symbol=ticker, outputsize=outputsize, **params)
+    except RateLimited:
+        logger.warning("Rate budget exhausted, keeping stored %s bars for %s", interval, ticker)
+        return None
+    return parse_time_series(data, interval)
+
+
+def _coalesced_sync(ticker, interval):
+    """One sync per series at a time, across threads and workers"""
+    fetch_coalescer.do(
+        f"bars_{interval}_{ticker}",
+        lambda: sync_bars(ticker, interval) or True,
+        recheck=lambda: True if bar_store.is_fresh(ticker, interval) else None)
+
+
+def ensure_bars(ticker, interval):
+    """
+    Make sure the store has something to serve for a series. A stale series
+    that already has data is topped up in the background; an empty one is
+    synced before returning.
+    """
+    if not bar_store.is_fresh(ticker, interval):
+        if bar_store.last_timestamp(ticker, interval) is None:
+            _coalesced_sync(ticker, interval)
+        else:
+            run_in_background(
+                f"bars_{interval}_{ticker}", lambda: _coalesced_sync(ticker, interval))
+
+
+def get_bars(ticker, interval='daily', since=None):
+    """Bars for a ticker served from the local store"""
+    ensure_bars(ticker, interval)
+    return bar_store.bars(ticker, interval, since=since)
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Size-capped in-memory cache with least-recently-used eviction.
+
+    Every key is prefixed with its data type (``quote_AAPL``, ``overview_AAPL``,
+    ``daily_AAPL``...) and the prefix picks the TTL from ``ttls``. Expired
+    entries are kept until they are evicted so callers can still fall back to
+    the last good value when the API is rate limited.
+    """
+
+    def __init__(self, maxsize=1024, ttls=None, default_ttl=300):
+        self.maxsize = maxsize
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def ttl_for(self, key):
+        """TTL in seconds for a key, based on its type prefix"""
+        return self.ttls.get(key.split('_', 1)[0], self.default_ttl)
+
+    def get(self, key, allow_expired=False):
+        """Return the cached value, or None when missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if not allow_expired and expires_at <= time.time():
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_entry(self, key):
+        """Return (value, expires_at) even if expired, or None when missing"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.ttl_for(key)
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        """Counters for inspecting cache behaviour at runtime"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'ttls': dict(self.ttls, default=self.default_ttl),
+            }
@@ -0,0 +1,83 @@
+import os
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .rate_limiter import UPSTREAM_WAIT_SECONDS, alpha_vantage_limiter
+
+BASE_URL = 'https://www.alphavantage.co/query'
+
+CONNECT_TIMEOUT = float(os.environ.get('ALPHA_VANTAGE_CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.environ.get('ALPHA_VANTAGE_READ_TIMEOUT', 10))
+MAX_RETRIES = int(os.environ.get('ALPHA_VANTAGE_MAX_RETRIES', 2))
+POOL_SIZE = int(os.environ.get('ALPHA_VANTAGE_POOL_SIZE', 10))
+RETRY_BACKOFF = 0.25
+
+# Responses worth retrying: throttling and gateway/server hiccups
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RateLimited(requests.RequestException):
+    """Raised when the shared rate limiter did not admit the call in time"""
+
+
+class AlphaVantageClient:
+    """
+    The one place the app talks to Alpha Vantage.
+
+    Keeps a pooled keep-alive Session so calls reuse TCP/TLS connections,
+    applies connect/read timeouts, asks for gzip, and retries transient
+    failures with jittered exponential backoff. Every attempt draws a token
+    from the shared rate limiter first.
+    """
+
+    def __init__(self, api_key=None, base_url=BASE_URL):
+        self._api_key = api_key
+        self.base_url = base_url
+        self.session = self._make_session()
+
+    @staticmethod
+    def _make_session():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Accept': 'application/json'})
+        return session
+
+    @property
+    def api_key(self):
+        return self._api_key or os.getenv('ALPHA_VANTAGE_API_KEY')
+
+    def query(self, function, wait=UPSTREAM_WAIT_SECONDS, **params):
+        """
+        Call ``function`` (OVERVIEW, GLOBAL_QUOTE, TIME_SERIES_DAILY...) and
+        return the decoded JSON. Raises RateLimited when no rate token
+        arrives within ``wait`` seconds, or the last requests error once
+        retries are exhausted.
+        """
+        params = dict(params, function=function, apikey=self.api_key)
+        last_error = None
+        for attempt in range(MAX_RETRIES + 1):
+            if attempt:
+                time.sleep(random.uniform(0, RETRY_BACKOFF * 2 ** attempt))
+            if not alpha_vantage_limiter.acquire(timeout=wait):
+                raise RateLimited(f"Rate budget exhausted for {function}")
+            try:
+                response = self.session.get(
+                    self.base_url, params=params, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+                continue
+            if response.status_code in RETRY_STATUSES:
+                last_error = requests.HTTPError(
+                    f"{response.status_code} from Alpha Vantage", response=response)
+                continue
+            response.raise_for_status()
+            return response.json()
+        raise last_error
+
+
+alpha_vantage = AlphaVantageClient()
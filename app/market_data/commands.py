@@ -0,0 +1,57 @@
+import logging
+import time
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func
+
+from app.models import db, PortfolioStocks, WatchlistStocks
+from .prefetch import PREFETCH_DAILY_RESERVE, prefetch
+
+logger = logging.getLogger(__name__)
+
+# `flask market-data --help`
+market_data_commands = AppGroup('market-data')
+
+
+def tracked_tickers():
+    """
+    Distinct held and watched tickers, most important first: held by the
+    most users, then watched by the most users.
+    """
+    holders = func.count(PortfolioStocks.id)
+    held = db.session.query(PortfolioStocks.ticker, holders) \
+        .filter(PortfolioStocks.share_count > 0) \
+        .group_by(PortfolioStocks.ticker) \
+        .order_by(holders.desc()).all()
+    watchers = func.count(WatchlistStocks.id)
+    watched = db.session.query(WatchlistStocks.ticker, watchers) \
+        .group_by(WatchlistStocks.ticker) \
+        .order_by(watchers.desc()).all()
+
+    tickers = []
+    for ticker, _ in held + watched:
+        ticker = ticker.upper()
+        if ticker not in tickers:
+            tickers.append(ticker)
+    return tickers
+
+
+# Creates the `flask market-data prefetch` command
+@market_data_commands.command('prefetch')
+@click.option('--loop', is_flag=True, help='Keep running, one pass every --interval seconds.')
+@click.option('--interval', default=300, show_default=True, help='Seconds between passes with --loop.')
+@click.option('--reserve', default=PREFETCH_DAILY_RESERVE, show_default=True,
+              help='Daily API calls to leave for user requests.')
+def prefetch_command(loop, interval, reserve):
+    """Warm the shared cache with quotes and bars for held and watched tickers"""
+    while True:
+        tickers = tracked_tickers()
+        # Don't hold a read transaction open while we wait on the API
+        db.session.remove()
+        stats = prefetch(tickers, reserve=reserve)
+        logger.info("Prefetched %d tickers: %d refreshed, %d already fresh, %d skipped",
+                    len(tickers), stats['refreshed'], stats['fresh'], stats['skipped'])
+        if not loop:
+            break
+        time.sleep(interval)
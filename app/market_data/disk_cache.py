@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .rate_limiter import MARKET_DATA_DIR
+from .sqlite_file import SQLiteFile
+
+logger = logging.getLogger(__name__)
+
+# Expired rows are kept this long as a last-good fallback before being purged
+STALE_RETENTION = int(os.environ.get('SHARED_CACHE_STALE_RETENTION', 7 * 86400))
+PURGE_EVERY = 500
+
+
+class SharedCache:
+    """
+    JSON key/value cache in a SQLite WAL file under MARKET_DATA_DIR.
+
+    Every worker on the host reads and writes the same file, so a quote
+    fetched by one worker is served to the others, and entries survive
+    worker recycling. Lookups are a single primary-key read on the
+    process's shared connection.
+    """
+
+    def __init__(self, path=None, ttls=None, default_ttl=300):
+        self.path = path or os.path.join(MARKET_DATA_DIR, 'cache.sqlite')
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.db = SQLiteFile(self.path, [
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL'
+            ') WITHOUT ROWID'])
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def ttl_for(self, key):
+        return self.ttls.get(key.split('_', 1)[0], self.default_ttl)
+
+    def get_entry(self, key, allow_expired=False):
+        """Return (value, expires_at) or None when missing or expired"""
+        try:
+            rows = self.db.execute(
+                'SELECT value, expires_at FROM entries WHERE key = ?', (key,))
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning("Shared cache read failed for %s: %s", key, e)
+            return None
+        row = rows[0] if rows else None
+        if row is None or (not allow_expired and row[1] <= time.time()):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0]), row[1]
+
+    def get(self, key, allow_expired=False):
+        entry = self.get_entry(key, allow_expired=allow_expired)
+        return entry[0] if entry else None
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.ttl_for(key)
+        try:
+            self.db.execute(
+                'INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value, separators=(',', ':')), time.time() + ttl))
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning("Shared cache write failed for %s: %s", key, e)
+            return
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % PURGE_EVERY == 0
+        if purge:
+            self.purge_expired()
+
+    def delete(self, key):
+        try:
+            self.db.execute('DELETE FROM entries WHERE key = ?', (key,))
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning("Shared cache delete failed for %s: %s", key, e)
+
+    def purge_expired(self):
+        """Drop rows that expired longer ago than STALE_RETENTION"""
+        try:
+            self.db.execute(
+                'DELETE FROM entries WHERE expires_at < ?', (time.time() - STALE_RETENTION,))
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning("Shared cache purge failed: %s", e)
+
+    def stats(self):
+        try:
+            size = self.db.execute('SELECT COUNT(*) FROM entries')[0][0]
+        except sqlite3.Error:
+            size = None
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'size': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
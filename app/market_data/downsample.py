@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+
+# Upper bound on a client-requested point count, so `points=` can't be
+# used to ask for more work than just sending the full series
+MAX_CHART_POINTS = int(os.getenv('MAX_CHART_POINTS', 2000))
+MIN_CHART_POINTS = 3
+
+
+def requested_points(args):
+    """
+    Target point count from `points=` (or its alias `resolution=`, the chart
+    width in pixels). Returns None when neither is given so callers send the
+    full series; raises ValueError on anything that isn't a usable number.
+    """
+    value = args.get('points') or args.get('resolution')
+    if value is None:
+        return None
+    try:
+        points = int(value)
+    except ValueError:
+        raise ValueError("points must be a whole number")
+    if points < MIN_CHART_POINTS:
+        raise ValueError(f"points must be at least {MIN_CHART_POINTS}")
+    return min(points, MAX_CHART_POINTS)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that keep
+    the visual shape of the line y(x). The first and last points are always
+    kept; every bucket in between contributes the point forming the largest
+    triangle with the previously kept point and the next bucket's average.
+    """
+    n = len(y)
+    if threshold >= n:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # threshold - 2 buckets over the interior points [1, n - 1)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i == threshold - 3:
+            next_x, next_y = x[-1], y[-1]
+        else:
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+    return indices
+
+
+def lttb(values, labels, threshold):
+    """
+    Downsample an evenly spaced list of prices to `threshold` points, keeping
+    the label of every kept point. Labels coarser than the prices (e.g. one
+    per 20 minutes of 5-minute prices) are matched by position.
+    """
+    if not threshold or len(values) <= threshold:
+        return values, labels
+    indices = lttb_indices(np.arange(len(values)), values, threshold)
+    kept_labels = [labels[i * len(labels) // len(values)] for i in indices] if labels else labels
+    return [values[i] for i in indices], kept_labels
+
+
+def minmax_buckets(bars, threshold):
+    """
+    Downsample OHLC bars to at most `threshold` candles by merging runs of
+    equal length. Each candle keeps the run's true high and low, so spikes
+    survive, along with its first open, last close and total volume.
+    """
+    if not threshold or len(bars) <= threshold:
+        return bars
+    starts = np.unique(np.linspace(0, len(bars), threshold, endpoint=False).astype(np.int64))
+    return bars.aggregate(starts)
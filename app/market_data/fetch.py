@@ -0,0 +1,179 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .cache import LRUCache
+from .client import RateLimited, alpha_vantage
+from .disk_cache import SharedCache
+from .market_hours import market_ttl
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# TTL per data type (seconds), keyed by the cache key prefix. Market data
+# uses these only while the market trades; see market_hours.expires_at
+CACHE_TTLS = {
+    'quote': int(os.getenv('QUOTE_CACHE_TTL', 300)),
+    'overview': int(os.getenv('OVERVIEW_CACHE_TTL', 7 * 86400)),
+    'intraday': int(os.getenv('INTRADAY_CACHE_TTL', 300)),
+    'daily': int(os.getenv('DAILY_CACHE_TTL', 3600)),
+}
+# How long past its TTL an entry may still be served while it is refreshed
+# in the background (stale-while-revalidate)
+CACHE_GRACE = {
+    'quote': int(os.getenv('QUOTE_STALE_GRACE', 900)),
+    'overview': int(os.getenv('OVERVIEW_STALE_GRACE', 7 * 86400)),
+    'intraday': int(os.getenv('INTRADAY_STALE_GRACE', 900)),
+    'daily': int(os.getenv('DAILY_STALE_GRACE', 86400)),
+}
+CACHE_MAX_ENTRIES = int(os.getenv('API_CACHE_MAX_ENTRIES', 2048))
+
+# Two tiers: a small per-worker LRU in front of the cache shared by all workers
+api_cache = LRUCache(maxsize=CACHE_MAX_ENTRIES, ttls=CACHE_TTLS)
+shared_cache = SharedCache(ttls=CACHE_TTLS)
+
+# Concurrent misses on the same key share one upstream fetch
+fetch_coalescer = SingleFlight()
+
+# Background refreshes for stale entries, at most one queued per key
+refresh_executor = ThreadPoolExecutor(max_workers=2)
+_pending_refreshes = set()
+_pending_lock = threading.Lock()
+
+
+def get_cached(cache_key, allow_expired=False):
+    """Return cached data if it is still fresh, without touching the API"""
+    data = api_cache.get(cache_key)
+    if data is not None:
+        return data
+
+    # Another worker may already have fetched it
+    entry = shared_cache.get_entry(cache_key)
+    if entry is not None:
+        data, expires_at = entry
+        api_cache.set(cache_key, data, ttl=expires_at - time.time())
+        return data
+
+    if allow_expired:
+        data = api_cache.get(cache_key, allow_expired=True)
+        if data is None:
+            data = shared_cache.get(cache_key, allow_expired=True)
+        return data
+    return None
+
+
+def cache_ttl(cache_key):
+    """TTL for a fresh entry, stretched to the next open while the market is closed"""
+    data_type = cache_key.split('_', 1)[0]
+    return market_ttl(data_type, CACHE_TTLS.get(data_type, api_cache.default_ttl))
+
+
+def get_stale(cache_key):
+    """Return an expired entry that is still inside its grace window"""
+    grace = CACHE_GRACE.get(cache_key.split('_', 1)[0], 0)
+    entries = [entry for entry in (
+        api_cache.get_entry(cache_key),
+        shared_cache.get_entry(cache_key, allow_expired=True)) if entry is not None]
+    if entries:
+        data, expires_at = max(entries, key=lambda entry: entry[1])
+        if expires_at + grace > time.time():
+            return data
+    return None
+
+
+def run_in_background(key, fn):
+    """Run fn on the refresh pool unless a job for the same key is queued"""
+    with _pending_lock:
+        if key in _pending_refreshes:
+            return
+        _pending_refreshes.add(key)
+
+    def job():
+        try:
+            fn()
+        except Exception as e:
+            logger.warning("Background refresh failed for %s: %s", key, e)
+        finally:
+            with _pending_lock:
+                _pending_refreshes.discard(key)
+
+    refresh_executor.submit(job)
+
+
+def schedule_refresh(cache_key, function, params):
+    """Refresh a stale entry off the request thread"""
+    run_in_background(cache_key, lambda: fetch_coalesced(cache_key, function, params))
+
+
+def get_cached_or_fetch(cache_key, function, **params):
+    """
+    Get data from cache or fetch from API with rate limiting, e.g.
+    get_cached_or_fetch('quote_AAPL', 'GLOBAL_QUOTE', symbol='AAPL')
+    """
+    # Check cache
+    data = get_cached(cache_key)
+    if data is not None:
+        logger.debug("Using cached data for %s", cache_key)
+        return data
+
+    # Serve a recently expired entry right away and refresh it in the background
+    data = get_stale(cache_key)
+    if data is not None:
+        logger.info("Serving stale %s, refreshing in background", cache_key)
+        schedule_refresh(cache_key, function, params)
+        return data
+
+    return fetch_coalesced(cache_key, function, params)
+
+
+def fetch_coalesced(cache_key, function, params):
+    """
+    Fetch now unless another request already refreshed the key. Only one
+    request per key goes upstream, in this worker and across workers.
+    """
+    return fetch_coalescer.do(
+        cache_key,
+        lambda: fetch_and_cache(cache_key, function, params),
+        recheck=lambda: get_cached(cache_key))
+
+
+def fetch_and_cache(cache_key, function, params):
+    """Fetch from the API and store valid responses in both cache tiers"""
+    # When the shared rate limiter has no token for us in time, serve
+    # whatever we had last rather than blocking the request
+    logger.info("Fetching from API: %s", cache_key)
+    try:
+        data = alpha_vantage.query(function, **params)
+    except RateLimited:
+        logger.warning("Rate budget exhausted, skipping fetch for %s", cache_key)
+        return get_cached(cache_key, allow_expired=True)
+
+    # Only cache if it's valid data (not a rate limit or error message)
+    if 'Note' not in data and 'Information' not in data:
+        ttl = cache_ttl(cache_key)
+        api_cache.set(cache_key, data, ttl=ttl)
+        shared_cache.set(cache_key, data, ttl=ttl)
+        logger.debug("Cached %s", cache_key)
+    else:
+        # Keep serving the last good value instead of the rate-limit notice
+        logger.warning("Not caching rate-limited response for %s", cache_key)
+        return get_cached(cache_key, allow_expired=True) or data
+    return data
+
+
+def market_price(ticker):
+    """Latest quoted price for a ticker, or None when no quote is available"""
+    try:
+        data = get_cached_or_fetch(f"quote_{ticker}", 'GLOBAL_QUOTE', symbol=ticker) or {}
+    except requests.RequestException as e:
+        logger.warning("No quote for %s: %s", ticker, e)
+        return None
+    try:
+        price = float(data.get('Global Quote', {}).get('05. price', 0))
+    except (ValueError, TypeError):
+        return None
+    return price or None
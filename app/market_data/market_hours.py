@@ -0,0 +1,128 @@
+"""
+NYSE trading calendar for cache expiry. Everything is computed from a
+built-in holiday table and the US daylight-saving rules, so it works
+offline and without tz data installed.
+"""
+import calendar
+import os
+import time
+from datetime import date, datetime, timedelta
+
+# Full-day closures
+NYSE_HOLIDAYS = {
+    date(2024, 1, 1), date(2024, 1, 15), date(2024, 2, 19), date(2024, 3, 29),
+    date(2024, 5, 27), date(2024, 6, 19), date(2024, 7, 4), date(2024, 9, 2),
+    date(2024, 11, 28), date(2024, 12, 25),
+    date(2025, 1, 1), date(2025, 1, 9), date(2025, 1, 20), date(2025, 2, 17),
+    date(2025, 4, 18), date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4),
+    date(2025, 9, 1), date(2025, 11, 27), date(2025, 12, 25),
+    date(2026, 1, 1), date(2026, 1, 19), date(2026, 2, 16), date(2026, 4, 3),
+    date(2026, 5, 25), date(2026, 6, 19), date(2026, 7, 3), date(2026, 9, 7),
+    date(2026, 11, 26), date(2026, 12, 25),
+    date(2027, 1, 1), date(2027, 1, 18), date(2027, 2, 15), date(2027, 3, 26),
+    date(2027, 5, 31), date(2027, 6, 18), date(2027, 7, 5), date(2027, 9, 6),
+    date(2027, 11, 25), date(2027, 12, 24),
+    date(2028, 1, 17), date(2028, 2, 21), date(2028, 4, 14), date(2028, 5, 29),
+    date(2028, 6, 19), date(2028, 7, 4), date(2028, 9, 4), date(2028, 11, 23),
+    date(2028, 12, 25),
+}
+
+# Sessions that end at 1:00 PM ET
+NYSE_EARLY_CLOSES = {
+    date(2024, 7, 3), date(2024, 11, 29), date(2024, 12, 24),
+    date(2025, 7, 3), date(2025, 11, 28), date(2025, 12, 24),
+    date(2026, 11, 27), date(2026, 12, 24),
+    date(2027, 11, 26),
+    date(2028, 7, 3), date(2028, 11, 24),
+}
+
+SESSION_OPEN = (9, 30)
+SESSION_CLOSE = (16, 0)
+EARLY_CLOSE = (13, 0)
+
+# Data that only changes while the market trades, and how long after the
+# close it may still move (closing auction prints, the day's bar being
+# published) before its expiry can be pinned to the next open
+AFTER_CLOSE_SETTLE = {
+    'quote': int(os.getenv('QUOTE_AFTER_CLOSE_SETTLE', 15 * 60)),
+    'intraday': int(os.getenv('INTRADAY_AFTER_CLOSE_SETTLE', 15 * 60)),
+    'daily': int(os.getenv('DAILY_AFTER_CLOSE_SETTLE', 3 * 3600)),
+}
+
+
+def _nth_sunday(year, month, n):
+    first = date(year, month, 1)
+    return first + timedelta(days=(6 - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def utc_offset(ts):
+    """Eastern time offset from UTC in seconds at epoch time ts"""
+    year = datetime.utcfromtimestamp(ts).year
+    # DST runs from 2:00 AM EST on the second Sunday of March to 2:00 AM
+    # EDT on the first Sunday of November
+    dst_start = calendar.timegm(_nth_sunday(year, 3, 2).timetuple()) + 7 * 3600
+    dst_end = calendar.timegm(_nth_sunday(year, 11, 1).timetuple()) + 6 * 3600
+    return -4 * 3600 if dst_start <= ts < dst_end else -5 * 3600
+
+
+def eastern_date(ts):
+    return datetime.utcfromtimestamp(ts + utc_offset(ts)).date()
+
+
+def _eastern_epoch(day, hour, minute):
+    local = calendar.timegm(day.timetuple()) + hour * 3600 + minute * 60
+    # Session times are never near a DST switch, so the offset at noon UTC works
+    return local - utc_offset(local + 5 * 3600)
+
+
+def is_trading_day(day):
+    return day.weekday() < 5 and day not in NYSE_HOLIDAYS
+
+
+def session_bounds(day):
+    """(open, close) epoch times of the regular session on day, or None"""
+    if not is_trading_day(day):
+        return None
+    close = EARLY_CLOSE if day in NYSE_EARLY_CLOSES else SESSION_CLOSE
+    return _eastern_epoch(day, *SESSION_OPEN), _eastern_epoch(day, *close)
+
+
+def is_market_open(now=None):
+    now = time.time() if now is None else now
+    bounds = session_bounds(eastern_date(now))
+    return bounds is not None and bounds[0] <= now < bounds[1]
+
+
+def next_open(now=None):
+    """Epoch time of the next regular session open strictly after now"""
+    now = time.time() if now is None else now
+    day = eastern_date(now)
+    for _ in range(15):
+        bounds = session_bounds(day)
+        if bounds and bounds[0] > now:
+            return bounds[0]
+        day += timedelta(days=1)
+    return now + 86400
+
+
+def expires_at(data_type, ttl, fetched_at=None):
+    """
+    When data of data_type fetched at fetched_at goes stale. During the
+    session (and the settle window after the close) that's just the TTL;
+    otherwise nothing can change until the next open, so expiry is pinned
+    there. Data types that don't follow the market (overview) use the TTL.
+    """
+    fetched_at = time.time() if fetched_at is None else fetched_at
+    settle = AFTER_CLOSE_SETTLE.get(data_type)
+    if settle is None:
+        return fetched_at + ttl
+    bounds = session_bounds(eastern_date(fetched_at))
+    if bounds and bounds[0] <= fetched_at < bounds[1] + settle:
+        return fetched_at + ttl
+    return max(fetched_at + ttl, next_open(fetched_at))
+
+
+def market_ttl(data_type, ttl, now=None):
+    """Seconds until data fetched now expires under the trading calendar"""
+    now = time.time() if now is None else now
+    return expires_at(data_type, ttl, now) - now
@@ -0,0 +1,81 @@
+import logging
+import os
+import time
+
+from .bars import _coalesced_sync, bar_store
+from .fetch import fetch_coalesced, get_cached
+from .rate_limiter import alpha_vantage_limiter
+
+logger = logging.getLogger(__name__)
+
+# Daily calls the prefetcher leaves untouched for requests from real users
+PREFETCH_DAILY_RESERVE = int(os.getenv('PREFETCH_DAILY_RESERVE', 5))
+# Longest the prefetcher waits for the per-minute budget before giving up a pass
+PREFETCH_MAX_WAIT = float(os.getenv('PREFETCH_MAX_WAIT', 120))
+
+
+def prefetch_plan(tickers):
+    """
+    (key, is_fresh, refresh) for everything worth keeping warm, most
+    important first: every quote, then daily bars, intraday bars and
+    finally company overviews. Tickers are expected in priority order.
+    """
+    plan = []
+    for ticker in tickers:
+        key = f"quote_{ticker}"
+        plan.append((key, lambda key=key: get_cached(key) is not None,
+                     lambda key=key, ticker=ticker: fetch_coalesced(key, 'GLOBAL_QUOTE', {'symbol': ticker})))
+    for interval in ('daily', '5min'):
+        for ticker in tickers:
+            plan.append((f"bars_{interval}_{ticker}",
+                         lambda ticker=ticker, interval=interval: bar_store.is_fresh(ticker, interval),
+                         lambda ticker=ticker, interval=interval: _coalesced_sync(ticker, interval)))
+    for ticker in tickers:
+        key = f"overview_{ticker}"
+        plan.append((key, lambda key=key: get_cached(key) is not None,
+                     lambda key=key, ticker=ticker: fetch_coalesced(key, 'OVERVIEW', {'symbol': ticker})))
+    return plan
+
+
+def wait_for_budget(reserve=PREFETCH_DAILY_RESERVE, max_wait=PREFETCH_MAX_WAIT):
+    """
+    Block until the shortest rate limit has a token to spare. Returns False
+    when the longest (daily) limit is down to the reserve, or the wait
+    would run past max_wait.
+    """
+    deadline = time.monotonic() + max_wait
+    while True:
+        tokens = alpha_vantage_limiter.available()
+        if not tokens:
+            return True
+        if tokens[max(tokens)] < 1 + reserve:
+            return False
+        if tokens[min(tokens)] >= 1:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(1)
+
+
+def prefetch(tickers, reserve=PREFETCH_DAILY_RESERVE, max_wait=PREFETCH_MAX_WAIT):
+    """
+    Refresh stale quotes, bars and overviews for tickers into the shared
+    cache and bar store, in priority order, stopping when the rate budget
+    runs out. Returns counts of refreshed, already-fresh and skipped items.
+    """
+    stats = {'refreshed': 0, 'fresh': 0, 'skipped': 0}
+    plan = prefetch_plan(tickers)
+    for position, (key, is_fresh, refresh) in enumerate(plan):
+        if is_fresh():
+            stats['fresh'] += 1
+            continue
+        if not wait_for_budget(reserve, max_wait):
+            stats['skipped'] = len(plan) - position
+            logger.warning("Prefetch out of rate budget, %d items left for next pass", stats['skipped'])
+            break
+        try:
+            refresh()
+            stats['refreshed'] += 1
+        except Exception as e:
+            logger.warning("Prefetch failed for %s: %s", key, e)
+    return stats
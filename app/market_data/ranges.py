@@ -0,0 +1,78 @@
+from datetime import datetime
+
+from .bars import bar_store
+from .cache import LRUCache
+from .series import WEEK_OFFSET
+
+# Chart range name -> the price array it fills in the get_stock payload
+CHART_RANGES = {
+    'day': 'dailyPrices',
+    'week': 'weeklyPrices',
+    'month': 'oneMonthPrices',
+    'year': 'yearlyPrices',
+    'all': 'allTimePrices',
+}
+
+# A range needs at least this many points to be worth drawing
+MIN_RANGE_POINTS = 2
+
+# Computed ranges per ticker, reused until either underlying series is refreshed
+_range_memo = LRUCache(maxsize=512, default_ttl=86400)
+
+
+def _time_label(ts):
+    hour, minute = divmod(int(ts) % 86400 // 60, 60)
+    return f"{hour % 12 or 12}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def _date_label(ts, with_year=False):
+    day = datetime.utcfromtimestamp(int(ts))
+    return day.strftime('%b %Y') if with_year else f"{day.strftime('%b')} {day.day}"
+
+
+def _weekday_label(ts):
+    return datetime.utcfromtimestamp(int(ts)).strftime('%a')
+
+
+def _build_ranges(intraday, daily):
+    """All five chart ranges as {name: (prices, labels)}, skipping ones without data"""
+    ranges = {}
+
+    # Day: the latest regular session of 5min bars
+    session = intraday.session()
+    if len(session):
+        session = session.since(session.ts[-1] // 86400 * 86400)
+        ranges['day'] = (session.close.tolist(), [_time_label(ts) for ts in session.ts])
+
+    if len(daily):
+        last = daily.ts[-1]
+        week = daily.since(last - 6 * 86400)
+        ranges['week'] = (week.close.tolist(), [_weekday_label(ts) for ts in week.ts])
+        month = daily.since(last - 30 * 86400)
+        ranges['month'] = (month.close.tolist(), [_date_label(ts) for ts in month.ts])
+        year = daily.since(last - 365 * 86400)
+        ranges['year'] = (year.close.tolist(), [_date_label(ts) for ts in year.ts])
+        # Full history as weekly closes keeps the payload bounded as history grows
+        history = daily.resample(7 * 86400, WEEK_OFFSET)
+        ranges['all'] = (history.close.tolist(), [_date_label(ts, True) for ts in history.ts])
+
+    return {name: series for name, series in ranges.items() if len(series[0]) >= MIN_RANGE_POINTS}
+
+
+def chart_ranges(ticker):
+    """
+    Real price series for every chart range, derived from the bar store.
+    The result is memoized per ticker and rebuilt only after the intraday
+    or daily series has been refreshed.
+    """
+    version = (bar_store.refreshed_at(ticker, '5min'), bar_store.refreshed_at(ticker, 'daily'))
+    if version == (None, None):
+        return {}
+    cache_key = f"ranges_{ticker}"
+    cached = _range_memo.get(cache_key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    ranges = _build_ranges(bar_store.bars(ticker, '5min'), bar_store.bars(ticker, 'daily'))
+    _range_memo.set(cache_key, (version, ranges))
+    return ranges
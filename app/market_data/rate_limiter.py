@@ -0,0 +1,112 @@
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+
+from .sqlite_file import SQLiteFile
+
+logger = logging.getLogger(__name__)
+
+# Directory shared by every gunicorn worker on the host
+MARKET_DATA_DIR = os.environ.get(
+    'MARKET_DATA_DIR', os.path.join(tempfile.gettempdir(), 'robincould-market-data'))
+
+# Alpha Vantage free tier: 5 calls per minute and 25 per day (0 disables a limit)
+CALLS_PER_MINUTE = int(os.environ.get('ALPHA_VANTAGE_CALLS_PER_MINUTE', 5))
+CALLS_PER_DAY = int(os.environ.get('ALPHA_VANTAGE_CALLS_PER_DAY', 25))
+
+# How long a request thread may queue for a token before giving up
+UPSTREAM_WAIT_SECONDS = float(os.environ.get('UPSTREAM_WAIT_SECONDS', 2.0))
+
+
+class TokenBucket:
+    """
+    Token bucket stored in a SQLite file so every worker process draws from
+    the same budget. Each limit is a (calls, period_seconds) pair and a call
+    is only admitted when every limit has a token left.
+    """
+
+    def __init__(self, name, limits, path=None):
+        self.name = name
+        self.limits = [(calls, period) for calls, period in limits if calls > 0]
+        self.path = path or os.path.join(MARKET_DATA_DIR, 'rate_limits.sqlite')
+        self.db = SQLiteFile(self.path, [
+            'CREATE TABLE IF NOT EXISTS buckets ('
+            'name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'])
+
+    def _tokens(self, conn, calls, period, now):
+        """Bucket key and its token count at `now`, after refilling since the last write"""
+        key = f"{self.name}:{calls}/{period}"
+        row = conn.execute(
+            'SELECT tokens, updated_at FROM buckets WHERE name = ?', (key,)).fetchone()
+        if row is None:
+            return key, float(calls)
+        return key, min(float(calls), row[0] + max(0.0, now - row[1]) * calls / period)
+
+    def _take(self):
+        """
+        Take one token from every limit in a single write transaction.
+        Returns 0 when the call is admitted, otherwise the number of seconds
+        until the emptiest bucket refills enough to admit it.
+        """
+        return self.db.run(self._take_in)
+
+    def _take_in(self, conn):
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            buckets = []
+            wait = 0.0
+            for calls, period in self.limits:
+                key, tokens = self._tokens(conn, calls, period, now)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) * period / calls)
+                buckets.append((key, tokens))
+
+            if wait == 0:
+                for key, tokens in buckets:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)',
+                        (key, tokens - 1, now))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+    def available(self):
+        """Tokens left right now per limit, as {period_seconds: tokens}, without taking any"""
+        now = time.time()
+        return self.db.run(lambda conn: {
+            period: self._tokens(conn, calls, period, now)[1] for calls, period in self.limits})
+
+    def try_acquire(self):
+        """Take a token if one is available right now, never waits"""
+        return self.acquire(timeout=0)
+
+    def acquire(self, timeout=UPSTREAM_WAIT_SECONDS):
+        """
+        Queue for a token for at most `timeout` seconds.
+        Returns False straight away when the next token cannot arrive before
+        the deadline, so callers can fall back to cached data instead.
+        """
+        if not self.limits:
+            return True
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                wait = self._take()
+            except sqlite3.Error as e:
+                # A broken limiter file should not take market data down with it
+                logger.warning("Rate limiter unavailable (%s), admitting call", e)
+                return True
+            if wait == 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+alpha_vantage_limiter = TokenBucket(
+    'alpha_vantage', [(CALLS_PER_MINUTE, 60), (CALLS_PER_DAY, 86400)])
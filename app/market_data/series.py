@@ -0,0 +1,121 @@
+import numpy as np
+
+# Alpha Vantage function, extra params and response key for each interval we store
+SERIES = {
+    'daily': ('TIME_SERIES_DAILY', {}, 'Time Series (Daily)'),
+    '5min': ('TIME_SERIES_INTRADAY', {'interval': '5min'}, 'Time Series (5min)'),
+}
+
+# Regular trading session in exchange-local seconds after midnight
+SESSION_OPEN = 9 * 3600 + 30 * 60
+SESSION_CLOSE = 16 * 3600
+
+# The epoch was a Thursday; shifting by four days makes weekly buckets start on Monday
+WEEK_OFFSET = 4 * 86400
+
+FIELDS = ('1. open', '2. high', '3. low', '4. close', '5. volume')
+
+
+class Bars:
+    """
+    Columnar OHLCV series: int64 epoch-second timestamps (exchange-local
+    wall clock encoded as if UTC), float64 open/high/low/close and int64
+    volume, sorted by time. Indexing with a slice or boolean mask returns
+    another Bars.
+    """
+
+    __slots__ = ('ts', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, ts, open, high, low, close, volume):
+        self.ts = ts
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def empty(cls):
+        prices = np.empty(0, dtype=np.float64)
+        return cls(np.empty(0, dtype=np.int64), prices, prices, prices, prices,
+                   np.empty(0, dtype=np.int64))
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (ts, open, high, low, close, volume) rows, e.g. a DB cursor"""
+        if not rows:
+            return cls.empty()
+        table = np.array(rows, dtype=np.float64)
+        return cls(table[:, 0].astype(np.int64), table[:, 1], table[:, 2], table[:, 3],
+                   table[:, 4], table[:, 5].astype(np.int64))
+
+    def rows(self):
+        """Plain Python (ts, open, high, low, close, volume) tuples"""
+        return list(zip(self.ts.tolist(), self.open.tolist(), self.high.tolist(),
+                        self.low.tolist(), self.close.tolist(), self.volume.tolist()))
+
+    def __len__(self):
+        return len(self.ts)
+
+    def __getitem__(self, index):
+        return Bars(self.ts[index], self.open[index], self.high[index], self.low[index],
+                    self.close[index], self.volume[index])
+
+    def since(self, ts):
+        return self[self.ts >= ts]
+
+    def last(self, n):
+        return self[-n:] if n else Bars.empty()
+
+    def session(self, start=SESSION_OPEN, end=SESSION_CLOSE):
+        """Only the bars inside the regular trading session"""
+        seconds_into_day = self.ts % 86400
+        return self[(seconds_into_day >= start) & (seconds_into_day < end)]
+
+    def resample(self, seconds, offset=0):
+        """
+        Aggregate into buckets of `seconds` (e.g. 3600 for hourly): first open,
+        max high, min low, last close, summed volume. Buckets are aligned to
+        the epoch shifted by `offset`; use WEEK_OFFSET for Monday-based weeks.
+        """
+        if not len(self):
+            return self
+        buckets = (self.ts - offset) // seconds
+        starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+        aggregated = self.aggregate(starts)
+        aggregated.ts = buckets[starts] * seconds + offset
+        return aggregated
+
+    def aggregate(self, starts):
+        """
+        Collapse consecutive runs of bars, each beginning at an index in
+        `starts`, into one bar per run stamped with the run's first timestamp.
+        """
+        ends = np.append(starts[1:], len(self)) - 1
+        return Bars(
+            self.ts[starts],
+            self.open[starts],
+            np.maximum.reduceat(self.high, starts),
+            np.minimum.reduceat(self.low, starts),
+            self.close[ends],
+            np.add.reduceat(self.volume, starts),
+        )
+
+
+def parse_time_series(data, interval):
+    """
+    Turn an Alpha Vantage time-series payload into Bars in one pass: the
+    timestamp keys are parsed as a datetime64 array and the five value
+    columns as a single float matrix, then everything is sorted together.
+    """
+    key = SERIES[interval][2]
+    if not data or key not in data or not data[key]:
+        return Bars.empty()
+    time_series = data[key]
+    ts = np.array(list(time_series), dtype='datetime64[s]').astype(np.int64)
+    values = np.array(
+        [[bar[field] for field in FIELDS] for bar in time_series.values()], dtype=np.float64)
+    order = np.argsort(ts, kind='stable')
+    values = values[order]
+    return Bars(ts[order], values[:, 0], values[:, 1], values[:, 2], values[:, 3],
+                values[:, 4].astype(np.int64))
@@ -0,0 +1,98 @@
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: coalesce within the process only
+    fcntl = None
+
+from .rate_limiter import MARKET_DATA_DIR
+
+# Longest a caller waits on someone else's fetch before doing its own
+COALESCE_TIMEOUT = float(os.environ.get('COALESCE_TIMEOUT', 15.0))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs one fetch per key at a time and hands its result to everyone who
+    asked for the same key meanwhile.
+
+    Inside a process, the first caller becomes the leader and the rest wait
+    for its result. Across processes, the leader also holds an flock on a
+    per-key lock file; leaders in other workers block on it, then call
+    ``recheck`` (normally a shared-cache read) before fetching themselves.
+    """
+
+    def __init__(self, lock_dir=None, timeout=COALESCE_TIMEOUT):
+        self.lock_dir = lock_dir or os.path.join(MARKET_DATA_DIR, 'locks')
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, recheck=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                return recheck() if recheck else None
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            with self._process_lock(key):
+                # Another worker may have finished the same fetch meanwhile
+                result = recheck() if recheck else None
+                if result is None:
+                    result = fn()
+            call.result = result
+            return result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            call.done.set()
+            with self._lock:
+                self._calls.pop(key, None)
+
+    @contextmanager
+    def _process_lock(self, key):
+        """Hold an flock on a per-key file while the leader fetches"""
+        if fcntl is None:
+            yield
+            return
+
+        os.makedirs(self.lock_dir, exist_ok=True)
+        path = os.path.join(self.lock_dir, re.sub(r'[^A-Za-z0-9_.-]', '_', key) + '.lock')
+        with open(path, 'a') as lock_file:
+            locked = False
+            deadline = time.monotonic() + self.timeout
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    locked = True
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        # The other worker looks stuck; fetch rather than hang
+                        break
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                if locked:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,65 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Longest a statement keeps retrying while another process holds the write lock
+BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', 5))
+
+
+class SQLiteFile:
+    """
+    One connection per process to a SQLite WAL file, shared by every thread
+    (or gevent greenlet) behind a lock and reopened after a fork.
+
+    SQLite's own busy handler sleeps inside C, which would stall every
+    greenlet in a gevent worker, so the connection never waits itself. When
+    another process has the database locked, `run` backs off with
+    time.sleep, which yields, and tries again.
+    """
+
+    def __init__(self, path, schema=()):
+        self.path = path
+        self.schema = schema
+        self._lock = threading.RLock()
+        self._conn = None
+        self._pid = None
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=0, isolation_level=None, check_same_thread=False)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            for statement in self.schema:
+                conn.execute(statement)
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    def run(self, fn):
+        """
+        Call fn(conn) holding the process's connection and return its result.
+        fn must leave no transaction open when it raises, so a locked
+        database can simply be retried.
+        """
+        deadline = time.monotonic() + BUSY_TIMEOUT
+        delay = 0.005
+        while True:
+            try:
+                with self._lock:
+                    # A connection inherited from the parent must never be used
+                    if self._pid != os.getpid():
+                        self._conn = self._open()
+                        self._pid = os.getpid()
+                    return fn(self._conn)
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e) or time.monotonic() >= deadline:
+                    raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+    def execute(self, sql, params=()):
+        """Run one statement and return all its rows"""
+        return self.run(lambda conn: conn.execute(sql, params).fetchall())
@@ -1,4 +1,4 @@
-from .db import db
+from .db import db, upsert
 from .user import User
 from .portfolio_stocks import PortfolioStocks
 from .watchlist_stocks import WatchlistStocks
@@ -1,3 +1,13 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects import postgresql, sqlite
 
 db = SQLAlchemy()
+
+
+def upsert(model):
+    """
+    INSERT for the current database that supports on_conflict_do_nothing()
+    and on_conflict_do_update() (Postgres in production, SQLite locally).
+    """
+    dialects = {'postgresql': postgresql, 'sqlite': sqlite}
+    return dialects[db.engine.dialect.name].insert(model)
@@ -4,9 +4,13 @@ from .db import db
 class PortfolioStocks(db.Model):
 
     __tablename__ = 'portfolio_stocks'
+    # One row per user and ticker; user_id leads, so it also serves per-user lookups
+    __table_args__ = (
+        db.Index('ix_portfolio_stocks_user_id_ticker', 'user_id', 'ticker', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    ticker = db.Column(db.VARCHAR(5), nullable=False)
+    ticker = db.Column(db.VARCHAR(5), nullable=False, index=True)
     basis = db.Column(db.Float, nullable=False)
     share_count = db.Column(db.Integer, nullable=False, default=0)
     user_id = db.Column(db.Integer, db.ForeignKey(
@@ -4,9 +4,13 @@ from .db import db
 class WatchlistStocks(db.Model):
 
     __tablename__ = 'watchlist_stocks'
+    # One row per user and ticker; user_id leads, so it also serves per-user lookups
+    __table_args__ = (
+        db.Index('ix_watchlist_stocks_user_id_ticker', 'user_id', 'ticker', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    ticker = db.Column(db.VARCHAR(5), nullable=False)
+    ticker = db.Column(db.VARCHAR(5), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey(
         "users.id", ondelete="CASCADE"), nullable=False)
 
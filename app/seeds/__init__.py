@@ -1,3 +1,4 @@
+import click
 from flask.cli import AppGroup
 from .users import seed_users, undo_users
 from .portfolio_stocks import seed_portfolio_stocks, undo_portfolio_stocks
@@ -8,10 +9,13 @@ seed_commands = AppGroup('seed')
 
 
 # Creates the `flask seed all` command
+# Prices come from app/seeds/prices.json unless --refresh-prices is passed
 @seed_commands.command('all')
-def seed():
+@click.option('--refresh-prices', is_flag=True, envvar='SEED_REFRESH_PRICES',
+              help='Fetch live quotes for seeded holdings, within the rate limit.')
+def seed(refresh_prices):
     seed_users()
-    seed_portfolio_stocks()
+    seed_portfolio_stocks(refresh_prices=refresh_prices)
     seed_watchlist()
     # Add other seed functions here
 
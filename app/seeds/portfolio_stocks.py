@@ -1,68 +1,49 @@
 from app.models import db, PortfolioStocks
-import requests
+from app.market_data import market_price
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
 import os
-import time
 
+logger = logging.getLogger(__name__)
 
-def get_stock_price(ticker):
+# Versioned price snapshot, so seeding never has to wait on Alpha Vantage.
+# Bump "version" and update "source" whenever the prices are replaced.
+PRICES_FIXTURE = os.path.join(os.path.dirname(__file__), 'prices.json')
+FALLBACK_PRICE = 100.00
+
+
+def load_seed_prices(path=PRICES_FIXTURE):
+    """Ticker -> price from the snapshot fixture"""
+    with open(path) as f:
+        fixture = json.load(f)
+    logger.info("Using seed prices v%s (%s)", fixture['version'], fixture['source'])
+    return {ticker: float(price) for ticker, price in fixture['prices'].items()}
+
+
+def refresh_seed_prices(prices, tickers):
     """
-    Fetch current stock price from Alpha Vantage API
-    Returns the price or a fallback value if API fails
+    Replace snapshot prices with live quotes, fetched in parallel. Every call
+    goes through the shared rate limiter, so once the budget is spent the
+    remaining tickers keep their snapshot price instead of waiting.
     """
-    api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
-    
-    if not api_key:
-        print(f"⚠️  No API key found. Using fallback price for {ticker}")
-        # Fallback prices if no API key
-        fallback_prices = {
-            'AAPL': 175.00,
-            'TSLA': 240.00,
-            'JPM': 145.00,
-            'MSFT': 370.00,
-            'GOOGL': 140.00,
-            'AMZN': 150.00,
-            'META': 330.00,
-            'NVDA': 495.00
-        }
-        return fallback_prices.get(ticker, 100.00)
-    
-    try:
-        url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={ticker}&apikey={api_key}"
-        print(f"📊 Fetching price for {ticker}...")
-        
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        
-        # Check for rate limiting
-        if 'Note' in data:
-            print(f"⚠️  API rate limit reached. Using fallback price for {ticker}")
-            time.sleep(1)  # Brief pause before next call
-            return 100.00
-        
-        # Extract price from Global Quote
-        global_quote = data.get('Global Quote', {})
-        if global_quote and '05. price' in global_quote:
-            price = float(global_quote['05. price'])
-            print(f"✅ {ticker}: ${price:.2f}")
-            time.sleep(12)  # Alpha Vantage free tier: 5 calls per minute (wait 12 seconds)
-            return price
-        else:
-            print(f"⚠️  No price data for {ticker}. Using fallback.")
-            return 100.00
-            
-    except Exception as e:
-        print(f"❌ Error fetching {ticker}: {e}")
-        return 100.00
+    if not os.getenv('ALPHA_VANTAGE_API_KEY'):
+        logger.warning("No API key found. Using snapshot prices")
+        return prices
+
+    with ThreadPoolExecutor(max_workers=len(tickers) or 1) as executor:
+        live = dict(zip(tickers, executor.map(market_price, tickers)))
 
+    refreshed = {ticker: price for ticker, price in live.items() if price}
+    logger.info("Refreshed %d of %d seed prices", len(refreshed), len(tickers))
+    return dict(prices, **refreshed)
 
-def seed_portfolio_stocks():
+
+def seed_portfolio_stocks(refresh_prices=False):
     """
-    Seed portfolio with real stock prices from Alpha Vantage API
+    Seed portfolios from the price snapshot, or from live quotes with
+    refresh_prices, in a single INSERT
     """
-    print("\n" + "="*50)
-    print("🌱 Seeding Portfolio Stocks with Real Prices")
-    print("="*50 + "\n")
-    
     # Define portfolio with tickers and quantities
     portfolio_data = [
         {'ticker': 'AAPL', 'shares': 5, 'user_id': 1},
@@ -72,32 +53,25 @@ def seed_portfolio_stocks():
         {'ticker': 'GOOGL', 'shares': 2, 'user_id': 2},
         {'ticker': 'NVDA', 'shares': 3, 'user_id': 3},
     ]
-    
-    # Create portfolio stocks with real prices
-    for stock_info in portfolio_data:
-        ticker = stock_info['ticker']
-        shares = stock_info['shares']
-        user_id = stock_info['user_id']
-        
-        # Get real price from API
-        price = get_stock_price(ticker)
-        basis = price  # Use current price as basis
-        
-        portfolio_stock = PortfolioStocks(
-            ticker=ticker,
-            basis=basis,
-            share_count=shares,
-            user_id=user_id
-        )
-        
-        db.session.add(portfolio_stock)
-        print(f"   Added: {shares} shares of {ticker} @ ${basis:.2f} for User {user_id}")
-    
+
+    prices = load_seed_prices()
+    if refresh_prices:
+        tickers = list(dict.fromkeys(stock['ticker'] for stock in portfolio_data))
+        prices = refresh_seed_prices(prices, tickers)
+
+    # Use the current price as the basis
+    rows = [
+        {
+            'ticker': stock['ticker'],
+            'basis': prices.get(stock['ticker'], FALLBACK_PRICE),
+            'share_count': stock['shares'],
+            'user_id': stock['user_id'],
+        }
+        for stock in portfolio_data
+    ]
+    db.session.execute(PortfolioStocks.__table__.insert().values(rows))
     db.session.commit()
-    
-    print("\n" + "="*50)
-    print("✅ Portfolio stocks seeded successfully!")
-    print("="*50 + "\n")
+    logger.info("Seeded %d portfolio stocks", len(rows))
 
 
 def undo_portfolio_stocks():
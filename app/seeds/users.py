@@ -1,15 +1,14 @@
+import logging
 from app.models import db, User
 
+logger = logging.getLogger(__name__)
+
 
 # Adds a demo user, you can add other users here if you want
 def seed_users():
     """
     Seed demo users with starting cash balances
     """
-    print("\n" + "="*50)
-    print("🌱 Seeding Users")
-    print("="*50 + "\n")
-    
     demo = User(
         username='Demo', 
         email='demo@aa.io', 
@@ -35,11 +34,7 @@ def seed_users():
 
     db.session.commit()
     
-    print("✅ Users seeded:")
-    print(f"   • Demo - $25,000.00")
-    print(f"   • Marnie - $50,000.00")
-    print(f"   • Bobbie - $15,000.00")
-    print()
+    logger.info("Seeded users: Demo ($25,000.00), Marnie ($50,000.00), Bobbie ($15,000.00)")
 
 
 # Uses a raw SQL query to TRUNCATE the users table.
@@ -1,12 +1,13 @@
+import logging
 from app.models import db, WatchlistStocks
 
+logger = logging.getLogger(__name__)
+
 
 def seed_watchlist():
     """
     Seed watchlist with popular stocks for demo users
     """
-    print("\n🌱 Seeding Watchlist Stocks...")
-    
     # Watchlist data: popular tech and finance stocks
     watchlist_data = [
         # User 1 (Demo) - Tech focused
@@ -40,7 +41,7 @@ def seed_watchlist():
         db.session.add(watchlist_stock)
     
     db.session.commit()
-    print("✅ Watchlist stocks seeded successfully!\n")
+    logger.info("Seeded %d watchlist stocks", len(watchlist_data))
 
 
 def undo_watchlist():
@@ -0,0 +1,43 @@
+import os
+import re
+
+from whitenoise import WhiteNoise
+
+# Create React App fingerprints bundles and media as name.<hash>.ext
+# (main.3f2a1b9c.js, 787.8e1f0a2d.chunk.css, logo.5d5d9eef.svg)
+HASHED_ASSET = re.compile(r'\.[0-9a-f]{8,}(\.chunk)?\.\w+$')
+
+# Cache lifetime (seconds) for unhashed files at the site root, e.g. favicon.ico
+STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', 3600))
+
+
+def is_hashed_asset(path, url):
+    """Hashed names never change content, so they can be cached forever"""
+    return bool(HASHED_ASSET.search(url))
+
+
+def no_cache_html(headers, path, url):
+    """index.html names the current bundles, so browsers must always revalidate it"""
+    if url.endswith('.html'):
+        headers['Cache-Control'] = 'no-cache'
+
+
+def serve_static(app):
+    """
+    Serve the React build straight from the WSGI layer so asset requests never
+    reach a Flask view. Bundles live under /static/, and favicon, manifest and
+    index.html at the site root. Precompressed .br/.gz siblings made by
+    `python -m whitenoise.compress app/static` are sent to clients that
+    accept them.
+    """
+    if not os.path.isdir(app.static_folder):
+        return
+    static = WhiteNoise(
+        app.wsgi_app,
+        max_age=STATIC_MAX_AGE,
+        immutable_file_test=is_hashed_asset,
+        add_headers_function=no_cache_html,
+    )
+    static.add_files(app.static_folder, prefix='static/')
+    static.add_files(app.static_folder, prefix='')
+    app.wsgi_app = static
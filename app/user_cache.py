@@ -0,0 +1,107 @@
+import os
+import uuid
+from flask import g, has_app_context
+from flask_login import UserMixin
+
+from .models import User
+from .market_data import LRUCache, shared_cache
+
+# Upper bound (seconds) on how long a worker keeps its copy of a user. Every
+# write bumps the user's version stamp in the shared cache, so all workers
+# drop their copy on their next lookup anyway.
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 30))
+USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 4096))
+# Stamps only need to outlive the local copies they guard
+USER_VERSION_TTL = 86400
+
+_users = LRUCache(maxsize=USER_CACHE_MAX_ENTRIES, default_ttl=USER_CACHE_TTL)
+
+
+class CachedUser(UserMixin):
+    """
+    Detached snapshot of the fields a request needs to know who is logged
+    in. Routes only read `current_user.id` and `current_user.to_dict()`;
+    anything that writes to the user loads the real row.
+    """
+
+    def __init__(self, id, username, email, cash_balance):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.cash_balance = cash_balance
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'username': self.username,
+            'email': self.email,
+            'cash_balance': self.cash_balance
+        }
+
+
+def _request_users():
+    if not has_app_context():
+        return {}
+    if 'users' not in g:
+        g.users = {}
+    return g.users
+
+
+def _version(user_id):
+    """The user's current version stamp, shared by every worker on the host"""
+    return shared_cache.get(f"userversion_{user_id}")
+
+
+def _bump_version(user_id):
+    version = uuid.uuid4().hex
+    shared_cache.set(f"userversion_{user_id}", version, ttl=USER_VERSION_TTL)
+    return version
+
+
+def _cache(user, version):
+    snapshot = CachedUser(**user.to_dict())
+    _users.set(f"user_{user.id}", (snapshot, version))
+    _request_users()[user.id] = snapshot
+    return snapshot
+
+
+def remember_user(user):
+    """
+    Cache a fresh snapshot of a User row right after committing a change to
+    it. Other workers see the new version and reload the row.
+    """
+    return _cache(user, _bump_version(user.id))
+
+
+def forget_user(user_id):
+    """Drop a user from every worker's cache so the next lookup reads the database"""
+    _bump_version(user_id)
+    _users.delete(f"user_{user_id}")
+    _request_users().pop(user_id, None)
+
+
+def get_user(user_id):
+    """
+    The logged-in user for `user_id`: from this request, then this worker's
+    cache if its version still matches the shared stamp, then the database.
+    Returns None for unknown ids.
+    """
+    user_id = int(user_id)
+    request_users = _request_users()
+    if user_id in request_users:
+        return request_users[user_id]
+
+    # Read the stamp before the row, so a write that lands in between leaves
+    # the copy tagged with the old stamp and it is reloaded next time
+    version = _version(user_id)
+    cached = _users.get(f"user_{user_id}")
+    if cached is not None and cached[1] == version:
+        request_users[user_id] = cached[0]
+        return cached[0]
+
+    if version is None:
+        version = _bump_version(user_id)
+    user = User.query.get(user_id)
+    if user is None:
+        return None
+    return _cache(user, version)
@@ -0,0 +1,62 @@
+"""
+Gunicorn settings, picked up automatically from the working directory.
+
+Requests spend nearly all their time waiting on Alpha Vantage, so each
+worker runs gevent greenlets instead of one blocking request at a time.
+Every setting can be overridden from the environment.
+"""
+import multiprocessing
+import os
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+
+if worker_class == 'gevent':
+    # Patch before the app is preloaded so requests, sockets, locks and the
+    # thread pools it creates at import time are all cooperative
+    from gevent import monkey
+    monkey.patch_all()
+    # psycopg2 is a C extension, so it needs its own hook to yield while waiting
+    if os.getenv('DATABASE_URL', '').startswith('postgres'):
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8000)}"
+
+# A gevent worker waits on upstream calls concurrently, so a few processes
+# are enough to use the CPUs; blocking workers need the usual 2 x CPUs + 1
+if worker_class == 'gevent':
+    default_workers = min(multiprocessing.cpu_count(), 4)
+else:
+    default_workers = multiprocessing.cpu_count() * 2 + 1
+workers = int(os.getenv('WEB_CONCURRENCY', default_workers))
+# Config splits DB_MAX_CONNECTIONS across this many worker pools
+os.environ['WEB_CONCURRENCY'] = str(workers)
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 200))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers now and then so slow leaks can't build up; the jitter keeps
+# them from all restarting at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Import the app once in the master and fork it, so workers share its memory
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Logs go through the app's logging setup on stdout
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Give each worker its own database and HTTP connections"""
+    from app import app
+    from app.models import db
+    from app.market_data import alpha_vantage
+
+    # Connections opened in the master must never be shared across processes
+    with app.app_context():
+        db.engine.dispose()
+    alpha_vantage.session = alpha_vantage._make_session()
@@ -0,0 +1,55 @@
+"""add (user_id, ticker) unique indexes and ticker indexes
+
+Revision ID: 3f6d2b9c41e7
+Revises: aa0a3b5c1185
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6d2b9c41e7'
+down_revision = 'aa0a3b5c1185'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Routes have always upper-cased tickers, but older rows may not be
+    op.execute('UPDATE portfolio_stocks SET ticker = UPPER(ticker)')
+    op.execute('UPDATE watchlist_stocks SET ticker = UPPER(ticker)')
+
+    # Merge duplicate positions into the oldest row: total shares and a
+    # share-weighted basis, then drop the rest so the unique index can build
+    op.execute(
+        'UPDATE portfolio_stocks SET '
+        'basis = (SELECT CASE WHEN SUM(d.share_count) > 0 '
+        'THEN SUM(d.share_count * d.basis) / SUM(d.share_count) ELSE MAX(d.basis) END '
+        'FROM portfolio_stocks d WHERE d.user_id = portfolio_stocks.user_id '
+        'AND d.ticker = portfolio_stocks.ticker), '
+        'share_count = (SELECT SUM(d.share_count) FROM portfolio_stocks d '
+        'WHERE d.user_id = portfolio_stocks.user_id AND d.ticker = portfolio_stocks.ticker) '
+        'WHERE id IN (SELECT MIN(id) FROM portfolio_stocks '
+        'GROUP BY user_id, ticker HAVING COUNT(*) > 1)')
+    op.execute(
+        'DELETE FROM portfolio_stocks WHERE id NOT IN '
+        '(SELECT MIN(id) FROM portfolio_stocks GROUP BY user_id, ticker)')
+    op.execute(
+        'DELETE FROM watchlist_stocks WHERE id NOT IN '
+        '(SELECT MIN(id) FROM watchlist_stocks GROUP BY user_id, ticker)')
+
+    op.create_index('ix_portfolio_stocks_user_id_ticker', 'portfolio_stocks',
+                    ['user_id', 'ticker'], unique=True)
+    op.create_index('ix_portfolio_stocks_ticker', 'portfolio_stocks', ['ticker'])
+    op.create_index('ix_watchlist_stocks_user_id_ticker', 'watchlist_stocks',
+                    ['user_id', 'ticker'], unique=True)
+    op.create_index('ix_watchlist_stocks_ticker', 'watchlist_stocks', ['ticker'])
+
+
+def downgrade():
+    op.drop_index('ix_watchlist_stocks_ticker', table_name='watchlist_stocks')
+    op.drop_index('ix_watchlist_stocks_user_id_ticker', table_name='watchlist_stocks')
+    op.drop_index('ix_portfolio_stocks_ticker', table_name='portfolio_stocks')
+    op.drop_index('ix_portfolio_stocks_user_id_ticker', table_name='portfolio_stocks')
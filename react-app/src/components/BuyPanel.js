@@ -5,8 +5,7 @@ import { getPortfolio } from '../store/portfolioStore';
 import { getSingleStock } from '../store/stocksStore';
 import "./BuyPanel.css"
 import WatchlistAddButton from './WatchlistAddButton';
-import { updateStock } from '../store/portfolioStore';
-import { updateBalance } from '../store/userStore';
+import { executeTrade } from '../store/portfolioStore';
 import { authenticate } from '../store/session';
 
 export default function BuyPanel({ ticker }) {
@@ -19,6 +18,7 @@ export default function BuyPanel({ ticker }) {
     const [currentPrice, setCurrentPrice] = useState(null);
     const [loading, setLoading] = useState(true);
     const [isProcessing, setIsProcessing] = useState(false);
+    const [quantity, setQuantity] = useState(1);
     
     useEffect(() => {
         // Fetch portfolio and user data on mount
@@ -52,6 +52,8 @@ export default function BuyPanel({ ticker }) {
     const shareCount = stockData?.share_count || 0
     const cashBalance = user?.cash_balance || 0
     const stockPrice = currentPrice || stockData?.basis || 0
+    const orderTotal = stockPrice * quantity
+    const shareLabel = quantity === 1 ? 'Share' : 'Shares'
 
     const handleBuy = async () => {
         if (isProcessing) return;
@@ -60,20 +62,15 @@ export default function BuyPanel({ ticker }) {
             alert('Unable to fetch current stock price. Please try again.');
             return;
         }
-        if (cashBalance < stockPrice) {
-            alert(`Insufficient funds. You need $${stockPrice.toFixed(2)} but only have $${cashBalance.toFixed(2)}`);
+        if (cashBalance < orderTotal) {
+            alert(`Insufficient funds. You need $${orderTotal.toFixed(2)} but only have $${cashBalance.toFixed(2)}`);
             return;
         }
         
         setIsProcessing(true);
         try {
-            // Update stock portfolio with price
-            await dispatch(updateStock(ticker, "add", stockPrice));
-            // Update user's cash balance (subtract the cost)
-            await dispatch(updateBalance(stockPrice, "subtract"));
-            // Refresh portfolio and user data
-            await dispatch(getPortfolio());
-            await dispatch(authenticate());
+            // One request buys the shares and debits the cash together
+            await dispatch(executeTrade(ticker, "buy", quantity, stockPrice));
             console.log('Buy completed successfully');
         } catch (error) {
             console.error('Error buying stock:', error);
@@ -86,20 +83,15 @@ export default function BuyPanel({ ticker }) {
     const handleSell = async () => {
         if (isProcessing) return;
         
-        if (shareCount <= 0) {
-            alert('You do not own any shares of this stock.');
+        if (shareCount < quantity) {
+            alert(`You only own ${shareCount} shares of this stock.`);
             return;
         }
         
         setIsProcessing(true);
         try {
-            // Update stock portfolio with price
-            await dispatch(updateStock(ticker, "subtract", stockPrice));
-            // Update user's cash balance (add the sale proceeds)
-            await dispatch(updateBalance(stockPrice, "add"));
-            // Refresh portfolio and user data
-            await dispatch(getPortfolio());
-            await dispatch(authenticate());
+            // One request sells the shares and credits the proceeds together
+            await dispatch(executeTrade(ticker, "sell", quantity, stockPrice));
             console.log('Sell completed successfully');
         } catch (error) {
             console.error('Error selling stock:', error);
@@ -126,23 +118,40 @@ export default function BuyPanel({ ticker }) {
                     <span>${stockPrice.toFixed(2)}</span>
                 </div>
 
+                <div id="buy-2">
+                    <span>Shares</span>
+                    <input
+                        type="number"
+                        min="1"
+                        step="1"
+                        value={quantity}
+                        onChange={e => setQuantity(Math.max(1, parseInt(e.target.value, 10) || 1))}
+                        disabled={isProcessing}
+                    />
+                </div>
+
+                <div id="buy-2">
+                    <span>Estimated Cost</span>
+                    <span>${orderTotal.toFixed(2)}</span>
+                </div>
+
             <div id="buy-3">
                 <button 
                     id='buy' 
                     onClick={handleBuy}
-                    disabled={isProcessing || cashBalance < stockPrice}
+                    disabled={isProcessing || cashBalance < orderTotal}
                     style={{opacity: isProcessing ? 0.6 : 1}}
                 >
-                    {isProcessing ? 'Processing...' : 'Buy 1 Share'}
+                    {isProcessing ? 'Processing...' : `Buy ${quantity} ${shareLabel}`}
                 </button>
                 <br></br>
                 <button 
                     id='sell' 
                     onClick={handleSell}
-                    disabled={isProcessing || shareCount <= 0}
+                    disabled={isProcessing || shareCount < quantity}
                     style={{opacity: isProcessing ? 0.6 : 1}}
                 >
-                    {isProcessing ? 'Processing...' : 'Sell 1 Share'}
+                    {isProcessing ? 'Processing...' : `Sell ${quantity} ${shareLabel}`}
                 </button>
             </div>
                 <div id="buy-4">
@@ -14,25 +14,16 @@ function Portfolio() {
     // Only fetch prices once when component mounts or portfolio changes significantly
     if (stocks.length > 0 && !hasFetched) {
       const fetchPrices = async () => {
-        const prices = {};
-        for (let stock of stocks) {
-          try {
-            const response = await fetch(`/api/stocks/${stock.ticker}`);
-            if (response.ok) {
-              const data = await response.json();
-              prices[stock.ticker] = {
-                currentPrice: data.currentPrice || data.price || 0,
-                percentChange: data.percentChange || 0,
-                companyName: data.companyName || stock.ticker,
-                logoUrl: data.logoUrl,
-                logoFallback: data.logoFallback
-              };
-            }
-          } catch (error) {
-            console.error(`Error fetching price for ${stock.ticker}:`, error);
+        const tickers = stocks.map(stock => stock.ticker).join(',');
+        try {
+          const response = await fetch(`/api/stocks/batch?tickers=${encodeURIComponent(tickers)}`);
+          if (response.ok) {
+            const data = await response.json();
+            setStockPrices(data.stocks || {});
           }
+        } catch (error) {
+          console.error('Error fetching portfolio prices:', error);
         }
-        setStockPrices(prices);
         setHasFetched(true);
       };
       
@@ -1,7 +1,7 @@
 const chartData = {
-  labels: data.results.map(item => new Date(item.t).toLocaleDateString()),
+  labels: data.results.t.map(t => new Date(t).toLocaleDateString()),
   datasets: [{
     label: ticker,
-    data: data.results.map(item => item.c), // closing prices
+    data: data.results.c, // closing prices
   }]
 };
\ No newline at end of file
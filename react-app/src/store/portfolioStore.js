@@ -1,3 +1,5 @@
+import { setUser } from "./session";
+
 const LOAD_PORTFOLIO = "portfolio/LOAD_PORTFOLIO";
 const BUY_STOCK = "portfolio/BUY_STOCK";
 
@@ -20,13 +22,14 @@ export const getPortfolio = () => async dispatch => {
     }
 };
 
-export const updateStock = (ticker, operator, price) => async dispatch => {
+// Buys or sells `quantity` shares; the server moves the cash in the same transaction
+export const updateStock = (ticker, operator, price, quantity = 1) => async dispatch => {
     if (operator === 'add' || operator === 'subtract') {
-        console.log(`Updating stock: ${ticker} ${operator} at price $${price}`);
+        console.log(`Updating stock: ${ticker} ${operator} ${quantity} at price $${price}`);
         const response = await fetch(`/api/portfolio-stocks/${ticker}/${operator}`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ price })
+            body: JSON.stringify({ price, quantity })
         });
         if (response.ok) {
             const purchasedStock = await response.json();
@@ -41,6 +44,24 @@ export const updateStock = (ticker, operator, price) => async dispatch => {
     }
 };
 
+// Buys or sells through /api/trades, which returns the new position and
+// balance together, so no follow-up portfolio or session fetch is needed
+export const executeTrade = (ticker, side, quantity, price) => async dispatch => {
+    const response = await fetch('/api/trades/', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ ticker, side, quantity, price })
+    });
+    const data = await response.json();
+    if (!response.ok) {
+        console.error('Error executing trade:', data);
+        throw new Error(data.error || 'Trade failed');
+    }
+    dispatch(addStock(data.position));
+    dispatch(setUser(data.user));
+    return data;
+};
+
 const initialState = {};
 
 export default function portfolioReducer(state = initialState, action) {
@@ -8,4 +8,5 @@ echo "Seeding database (continuing on error if already seeded)..."
 flask seed all || echo "Database already seeded, continuing..."
 
 echo "Starting gunicorn..."
+# Workers, gevent and timeouts come from gunicorn.conf.py
 exec gunicorn app:app
@@ -0,0 +1,83 @@
+"""
+Tests for sync_bars topping up a stored daily series when upstream's compact
+window no longer reaches back to the stored tail.
+"""
+
+import os
+import tempfile
+from datetime import datetime, timezone
+
+import pytest
+
+# Importing the market data package loads the app, which needs its settings
+TMP_DIR = tempfile.mkdtemp()
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(TMP_DIR, 'bars.db')}")
+os.environ.setdefault('SECRET_KEY', 'test')
+os.environ.setdefault('MARKET_DATA_DIR', os.path.join(TMP_DIR, 'market-data'))
+
+from app.market_data import bars as bars_module  # noqa: E402
+from app.market_data.bars import BarStore, sync_bars  # noqa: E402
+
+DAY = 86400
+# 2024-01-01
+START = 1704067200
+
+
+def payload(first_day, last_day):
+    """A TIME_SERIES_DAILY response covering the given day offsets"""
+    series = {}
+    for day in range(first_day, last_day + 1):
+        date = datetime.fromtimestamp(START + day * DAY, timezone.utc).strftime('%Y-%m-%d')
+        series[date] = {'1. open': '1', '2. high': '1', '3. low': '1', '4. close': '1', '5. volume': '1'}
+    return {'Time Series (Daily)': series}
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = BarStore(str(tmp_path / 'bars.sqlite'))
+    monkeypatch.setattr(bars_module, 'bar_store', store)
+    monkeypatch.setattr(store, 'is_fresh', lambda ticker, interval: False)
+    return store
+
+
+def serve(monkeypatch, responses):
+    """Answer upstream queries by outputsize and record what was asked for"""
+    calls = []
+
+    def query(function, outputsize, **params):
+        calls.append(outputsize)
+        return responses[outputsize]
+
+    monkeypatch.setattr(bars_module.alpha_vantage, 'query', query)
+    return calls
+
+
+def test_overlapping_window_has_no_gap(monkeypatch, store):
+    serve(monkeypatch, {'compact': payload(0, 9)})
+    sync_bars('AAPL', 'daily')
+    serve(monkeypatch, {'compact': payload(5, 20)})
+    sync_bars('AAPL', 'daily')
+    assert len(store.bars('AAPL', 'daily')) == 21
+    assert store.gaps('AAPL', 'daily') == []
+
+
+def test_gap_is_recorded_without_full_history(monkeypatch, store):
+    monkeypatch.setattr(bars_module, 'FULL_HISTORY', False)
+    serve(monkeypatch, {'compact': payload(0, 9)})
+    sync_bars('AAPL', 'daily')
+    calls = serve(monkeypatch, {'compact': payload(200, 299)})
+    sync_bars('AAPL', 'daily')
+    assert calls == ['compact']
+    assert store.gaps('AAPL', 'daily') == [(START + 9 * DAY, START + 200 * DAY)]
+
+
+def test_gap_is_filled_from_full_history(monkeypatch, store):
+    monkeypatch.setattr(bars_module, 'FULL_HISTORY', False)
+    serve(monkeypatch, {'compact': payload(0, 9)})
+    sync_bars('AAPL', 'daily')
+    monkeypatch.setattr(bars_module, 'FULL_HISTORY', True)
+    calls = serve(monkeypatch, {'compact': payload(200, 299), 'full': payload(0, 299)})
+    sync_bars('AAPL', 'daily')
+    assert calls == ['compact', 'full']
+    assert len(store.bars('AAPL', 'daily')) == 300
+    assert store.gaps('AAPL', 'daily') == []
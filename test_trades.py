@@ -0,0 +1,105 @@
+"""
+Tests for POST /api/trades: fills at the server's quote, cash and share
+checks, and rejection of prices the server can't trust.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'trades.db')
+os.environ['DATABASE_URL'] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault('SECRET_KEY', 'test')
+os.environ['MARKET_DATA_DIR'] = os.path.join(os.path.dirname(DB_PATH), 'market-data')
+
+from app import app  # noqa: E402
+from app import user_cache  # noqa: E402
+from app.api import trade_routes  # noqa: E402
+from app.models import db, User, PortfolioStocks  # noqa: E402
+
+QUOTES = {'AAPL': 100.0}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv('ALPHA_VANTAGE_API_KEY', 'test')
+    monkeypatch.setattr(trade_routes, 'market_price', lambda ticker: QUOTES.get(ticker))
+    user_cache._users.clear()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(User(username='demo', email='demo@aa.io', password='password', cash_balance=1000))
+        db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+    return client
+
+
+def trade(client, **body):
+    return client.post('/api/trades/', json=dict({'ticker': 'AAPL'}, **body))
+
+
+def balance_and_shares():
+    with app.app_context():
+        position = PortfolioStocks.query.filter_by(user_id=1, ticker='AAPL').one_or_none()
+        return User.query.get(1).cash_balance, position.share_count if position else 0
+
+
+def test_buy_fills_at_the_quote(client):
+    response = trade(client, side='buy', quantity=3, price=100.5)
+    assert response.status_code == 200
+    assert response.get_json()['user']['cash_balance'] == 700
+    assert balance_and_shares() == (700, 3)
+
+
+def test_sell_fills_at_the_quote(client):
+    trade(client, side='buy', quantity=2)
+    response = trade(client, side='sell', quantity=1)
+    assert response.status_code == 200
+    assert balance_and_shares() == (900, 1)
+
+
+def test_overdraw_is_refused(client):
+    response = trade(client, side='buy', quantity=11)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Insufficient funds'
+    assert balance_and_shares() == (1000, 0)
+
+
+def test_oversell_is_refused(client):
+    trade(client, side='buy', quantity=1)
+    response = trade(client, side='sell', quantity=2)
+    assert response.status_code == 400
+    assert balance_and_shares() == (900, 1)
+
+
+@pytest.mark.parametrize('price', ['nan', 'inf', '-inf', 0, -5, 'abc'])
+def test_bad_price_is_refused(client, price):
+    response = trade(client, side='buy', quantity=1, price=price)
+    assert response.status_code == 400
+    assert balance_and_shares() == (1000, 0)
+
+
+def test_client_price_far_from_quote_is_refused(client):
+    trade(client, side='buy', quantity=1, price=1)
+    response = trade(client, side='sell', quantity=1, price=1e9)
+    assert response.status_code == 409
+    assert balance_and_shares() == (1000, 0)
+
+
+def test_no_quote_is_refused(client):
+    response = trade(client, ticker='ZZZZ', side='buy', quantity=1, price=10)
+    assert response.status_code == 503
+    assert balance_and_shares() == (1000, 0)
+
+
+def test_portfolio_route_uses_the_same_checks(client):
+    response = client.post('/api/portfolio-stocks/AAPL/add', json={'quantity': 1, 'price': 'nan'})
+    assert response.status_code == 400
+    response = client.post('/api/portfolio-stocks/AAPL/add', json={'quantity': 2, 'price': 1})
+    assert response.status_code == 409
+    response = client.post('/api/portfolio-stocks/AAPL/add', json={'quantity': 2, 'price': 99.5})
+    assert response.status_code == 200
+    assert balance_and_shares() == (800, 2)